@@ -1,317 +1,1302 @@
-from pyexpat import XML_PARAM_ENTITY_PARSING_UNLESS_STANDALONE
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import importlib
+import inspect
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
 import numpy as np
-import sympy as sym
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import cm
-from matplotlib.ticker import LinearLocator
 from math import gamma
-from scipy.special import gammainc
+from scipy.special import chdtrc, kolmogorov, gammainc, gammaincinv, gammaln, log_ndtr, ndtr, ndtri, pdtr, pdtrc, bdtr, xlogy, xlog1py
+
+class _LazyModule():
+    '''
+    Stands in for a module and only imports it when one of its attributes is first used.
+    sympy and matplotlib take most of a second to import, and sampling never needs them, so they are only loaded for the symbolic formulas and the graphs.
+    '''
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+sym = _LazyModule('sympy')
+plt = _LazyModule('matplotlib.pyplot')
+
+_DISTRIBUTION_TYPES = {} #Every distribution class by name, for from_dict
+
+SAMPLER_VERSION = 1 #Part of every sample_store key. It goes up whenever a change means a seed no longer gives the same samples, so old stored samples aren't used
+
+_CACHED_METHODS = ('find_PDF', 'find_CDF', 'find_quantile') #The methods enable_cache can remember results for
+
+_MAX_TABLE_SIZE = 2 ** 22 #The most whole numbers a discrete CDF table is ever made for. Wider distributions find their quantiles with a guided search instead
+
+#The other methods enable_profiling times. _draw_samples is where every way of taking samples (chunks and files too) makes them
+_PROFILED_METHODS = ('find_log_PDF', 'find_log_CDF', 'take_sample', 'take_multiple_samples', 'take_parallel_samples', '_draw_samples',
+                     'curve_points', 'take_linear_regression_samples', 'check_moments', 'find_KS_statistic', 'find_chi_squared_statistic',
+                     'find_histogram', 'find_ECDF')
+
+_PROFILE = None #The profile being recorded by enable_profiling, or None when profiling is off
+
+def _memoised(method):
+    '''
+    Wraps a find_* method so it checks the distribution's cache first, if enable_cache has been called, and is timed when profiling is on.
+    When the cache and profiling are off this is two checks for None, so it costs almost nothing. Only calls where every argument is a single value
+    are cached, and only when they give back a single value, so an array (which the caller could change) is never shared between calls.
+    Arrays, lists and tuples are already vectorised anyway. nan isn't cached either, as it isn't equal to itself and so would never be found again.
+    '''
+    name = method.__name__
+    signature = inspect.signature(method)
+    has_symbolic = 'symbolic' in signature.parameters
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profile = _PROFILE
+        if profile is not None:
+            start = time.perf_counter()
+            if has_symbolic and signature.bind(self, *args, **kwargs).arguments.get('symbolic'):
+                profile.flag_symbolic(self, name + '(symbolic=True)')
+        cache = self._memo
+        if cache is None:
+            result = method(self, *args, **kwargs)
+        else:
+            key = None
+            if all(np.ndim(a) == 0 and a == a for a in args) and all(np.ndim(v) == 0 and v == v for v in kwargs.values()):
+                try:
+                    key = (name, tuple((type(a), a) for a in args), tuple(sorted((k, type(v), v) for k, v in kwargs.items())))
+                    hash(key)
+                except TypeError:
+                    key = None
+            if key is None:
+                result = method(self, *args, **kwargs)
+            else:
+                found, result = cache.get(key)
+                if not found:
+                    result = method(self, *args, **kwargs)
+                    if np.ndim(result) == 0: #A distribution with arrays of parameters gives an array even for one x
+                        cache.put(key, result)
+        if profile is not None:
+            profile.record(self, name, start, result)
+        return result
+    return wrapper
+
+def _profiled(method):
+    '''
+    Wraps a method so its calls are counted and timed while profiling is on. When it is off this is one check for None
+    '''
+    name = method.__name__
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profile = _PROFILE
+        if profile is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        profile.record(self, name, start, result)
+        return result
+    return wrapper
+
+class _Profile():
+    '''
+    What enable_profiling records: the calls, total time and number of elements for every class and method,
+    and how many times each symbolic (sympy) evaluation happened
+    '''
+    def __init__(self, trace_symbolic):
+        self.methods = {}
+        self.symbolic = {}
+        self.trace_symbolic = trace_symbolic
+        self.lock = threading.Lock() #Worker threads of take_parallel_samples record at the same time
+
+    def record(self, owner, name, start, result):
+        elapsed = time.perf_counter() - start
+        key = type(owner).__name__ + '.' + name
+        elements = _element_count(result)
+        with self.lock:
+            entry = self.methods.setdefault(key, {'calls': 0, 'time': 0.0, 'elements': 0})
+            entry['calls'] += 1
+            entry['time'] += elapsed
+            entry['elements'] += elements
+
+    def flag_symbolic(self, owner, what):
+        key = type(owner).__name__ + '.' + what
+        with self.lock:
+            self.symbolic[key] = self.symbolic.get(key, 0) + 1
+        if self.trace_symbolic:
+            print("Symbolic evaluation: " + key)
+
+    def info(self):
+        with self.lock:
+            return {'methods': {key: dict(entry) for key, entry in self.methods.items()}, 'symbolic': dict(self.symbolic)}
+
+def enable_profiling(trace_symbolic=False):
+    '''
+    Starts recording, for every distribution class and method, how many times it is called, the total time spent in it (including the calls it makes)
+    and how many elements (values or samples) it gave back. Every symbolic evaluation is counted too: building the sympy pdf, cdf or quantile,
+    calling a find_* method with symbolic = True, and curve_points falling back to sorting a sample because there is no quantile.
+    With trace_symbolic, each symbolic evaluation is also printed as it happens. Starting again throws away what was recorded so far.
+    When profiling is off it costs one check for None per call.
+    '''
+    global _PROFILE
+    _PROFILE = _Profile(trace_symbolic)
+
+def disable_profiling():
+    '''
+    Stops profiling and gives what was recorded, the same as profile_info, or None if it wasn't on
+    '''
+    global _PROFILE
+    info = profile_info()
+    _PROFILE = None
+    return info
+
+def clear_profile():
+    '''
+    Throws away what has been recorded so far, keeping profiling turned on
+    '''
+    if _PROFILE is not None:
+        enable_profiling(_PROFILE.trace_symbolic)
+
+def profile_info(as_json=False):
+    '''
+    Gives what profiling has recorded as a dictionary, or as a JSON string if as_json is True, or None if profiling is off.
+    'methods' has an entry like 'poisson_distribution.find_quantile' for every method called, with its calls, time (in seconds) and elements,
+    and 'symbolic' counts every symbolic evaluation by where it happened
+    '''
+    if _PROFILE is None:
+        return None
+    info = _PROFILE.info()
+    if as_json:
+        return json.dumps(info, indent=2)
+    return info
+
+def _element_count(result):
+    '''
+    How many values a profiled method gave back. For tuples such as (x, y) from curve_points or (x, y, M) from find_PDF_grid it is the size of the last one,
+    and the diagnostics give dictionaries with the count of samples
+    '''
+    if isinstance(result, tuple):
+        result = result[-1]
+    if isinstance(result, dict):
+        return int(result.get('count', 1))
+    if result is None:
+        return 0
+    return int(np.size(result))
+
+class _MemoCache():
+    '''
+    A least recently used cache with hit and miss counts, for Distribution.enable_cache.
+    Keys include the type of every argument, so 0.5, sympy.Float(0.5) and sympy.Rational(1, 2) are kept apart.
+    '''
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock() #So worker threads sharing a distribution don't corrupt the order
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if self.maxsize is not None and len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False) #Removes the least recently used result
 
 class Distribution():
     # This is the generic class that all distributions will inherit from
+    #
+    # Distributions use __slots__ so they are small: the parameters, plus caches which start empty.
+    # _args and _kwargs are what the distribution was made with, which is all pickling and to_dict need to make it again.
+    # The caches are _symbolic (sympy formulas), _table (CDF table), _alias (alias table) and _memo (enable_cache), and are never pickled.
+    #
+    # The parameters can also be lists or numpy arrays, which broadcast against each other like numpy arrays do, so one distribution
+    # stands for a whole grid of parameter sets. find_PDF, find_CDF and find_quantile then broadcast x against that grid,
+    # and samples have the shape (num,) + shape. The symbolic formulas, graphs and tables only work with single numbers as parameters.
+    __slots__ = ('mean', 'var', 'sd', 'min', 'max', '_args', '_kwargs', '_symbolic', '_table', '_alias', '_memo')
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        self._args = args
+        self._kwargs = kwargs
+        self._symbolic = None
+        self._table = None
+        self._alias = None
+        self._memo = None #The cache made by enable_cache, or None when it is off
+        return self
+
+    def __init_subclass__(cls, **kwargs):
+        '''
+        Wraps the find_PDF, find_CDF and find_quantile of every distribution so enable_cache works on all of them without changing how they are called,
+        and records the class so from_dict can find it by name. Methods the class overrides are also wrapped so enable_profiling can time them
+        '''
+        super().__init_subclass__(**kwargs)
+        for name in _CACHED_METHODS:
+            if name in cls.__dict__:
+                setattr(cls, name, _memoised(cls.__dict__[name]))
+        for name in _PROFILED_METHODS:
+            if name in cls.__dict__:
+                setattr(cls, name, _profiled(cls.__dict__[name]))
+        _DISTRIBUTION_TYPES[cls.__name__] = cls
+
+    def __reduce__(self):
+        '''
+        Pickles only the type and the parameters, so a distribution is a few dozen bytes to send to another process.
+        Everything else is worked out again (lazily) when it is unpickled
+        '''
+        if self._kwargs:
+            return (_rebuild_distribution, (type(self), self._args, self._kwargs))
+        return (type(self), self._args)
+
+    def to_dict(self):
+        '''
+        Gives the distribution as a dictionary of its type name and its parameters by name, for example
+        {'type': 'normal_distribution', 'parameters': {'mean': 0, 'var': 1}}. from_dict turns it back into a distribution
+        '''
+        return _to_dict(self, type(self).__init__)
+
+    @staticmethod
+    def from_dict(dictionary):
+        '''
+        Makes a distribution (including a joint_distribution) from a dictionary given by to_dict
+        '''
+        return _from_dict(dictionary)
+
+
+    @property
+    def shape(self):
+        '''
+        The shape the parameters broadcast to, which is () when they are all single numbers
+        '''
+        return np.broadcast_shapes(*(np.shape(value) for value in self._args + tuple(self._kwargs.values())))
+
+    def find_parameter_set(self, index):
+        '''
+        The distribution with single numbers as parameters at the given index of the parameter grid, such as (0,) for the first one.
+        The methods which only work with single numbers as parameters (the diagnostics, graphs and sums) can be used on it
+        '''
+        shape = self.shape
+        args = [_parameter_at(value, shape, index) for value in self._args]
+        kwargs = {name: _parameter_at(value, shape, index) for name, value in self._kwargs.items()}
+        return type(self)(*args, **kwargs)
+
+    def _has_parameter_grid(self, name):
+        '''
+        For methods which only work with single numbers as parameters. Prints a message and gives True if this distribution has a grid of them
+        '''
+        if not self.shape:
+            return False
+        print(name + " can only be used with single numbers as parameters, but this distribution has a grid of them with the shape " + str(self.shape)
+              + ". Use it on each parameter set from find_parameter_set instead.")
+        return True
+
+    def enable_cache(self, maxsize=128):
+        '''
+        Makes this distribution remember the results of find_PDF, find_CDF and find_quantile for single values,
+        keeping the maxsize most recently used ones (or all of them if maxsize is None).
+        This helps when the same values are asked for again and again, such as redrawing graphs. Arrays, lists and tuples are never cached,
+        and neither is anything which gives back an array.
+        '''
+        self._memo = _MemoCache(maxsize)
+
+    def disable_cache(self):
+        '''
+        Turns the cache off and throws away what it remembered
+        '''
+        self._memo = None
+
+    def clear_cache(self):
+        '''
+        Empties the cache and resets its counts, keeping it turned on
+        '''
+        if self._memo is not None:
+            self._memo = _MemoCache(self._memo.maxsize)
+
+    def cache_info(self):
+        '''
+        Gives the cache's hits, misses, maxsize and current size as a dictionary, or None if it is off
+        '''
+        if self._memo is None:
+            return None
+        return {'hits': self._memo.hits, 'misses': self._memo.misses, 'maxsize': self._memo.maxsize, 'currsize': len(self._memo.entries)}
+
     def take_sample(self, seed=None):
         '''
         Takes a single sample from a population which follows the given distribution.
         The sample follows a given seed. If no seed is given, it will generate a random seed
         '''
-        if self.HasQuantile: #If the function has a defined quantile in beanPy
-            if seed is None:
-                y = rng_unseeded.random() #Random number in (0,1) using the rng created at the start
-            else:
-                rng_seeded = np.random.default_rng(seed) #Sets a new seed
-                y = rng_seeded.random() #Random number in (0,1) using the seed
-            sample = self.find_quantile(y) #Applies that random number to the Quantile function
+        if seed is None:
+            rng = rng_unseeded #Uses the rng created at the start
+        else:
+            rng = np.random.default_rng(seed) #Sets a new seed
+        sample = self._find_samples(1, rng)[0] #The same way take_multiple_samples makes them, so a seeded sample is the first of a seeded batch
 
-        else: #If the function takes samples in a different way, such as chi squared
-            sample = self._find_sample()
-    
+        if self.shape: #One sample for every parameter set
+            return sample.astype(self._default_dtype())
         if self.IsDiscrete:
-            return(sample)
+            return(np.asarray(sample, dtype=self._default_dtype()).item())
         
         return( float(sample) )
 
-    def take_multiple_samples(self, num, seed=None):
+    def take_multiple_samples(self, num, seed=None, out=None, dtype=None, method='quantile', uniforms='random', scramble=True):
+        '''
+        This takes a sample of given size and optional seed, and returns it as a numpy array.
+        All of the samples are made in one vectorised call, and a seeded sample gives the same values as taking the samples one at a time.
+        An existing array can be given as 'out' to have the samples written into it instead of a new array being made.
+        'dtype' sets the type of the returned array. By default it is float for continuous distributions and int for discrete ones.
+
+        For discrete distributions, method = 'alias' uses Walker's alias method, which takes the same time per sample however spread out the distribution is.
+        The alias table is made on the first call and kept for later ones. It uses the random numbers differently, so seeded samples won't match the quantile method.
+
+        When the parameters are arrays the result has the shape (num,) + shape. One seed makes every parameter set from one random number stream in a single call.
+        A list (or array) of seeds with the same shape as the parameters gives every parameter set its own seed instead,
+        so each column is what the distribution with just those parameters would give with that seed.
+
+        'uniforms' chooses the uniform numbers put through the quantile, which can make Monte Carlo estimates converge with far fewer samples:
+        'random' is numpy's ordinary random numbers. 'sobol' and 'halton' are low discrepancy sequences, scrambled if scramble is True (Sobol works best when num is a power of 2).
+        Unscrambled points are moved to the middles of the cells they are on, so none is exactly 0.
+        'lhs' is a Latin hypercube. 'stratified' puts one number in each of num equal strata in a random order, which in more than one dimension is also a Latin hypercube.
+        'antithetic' gives pairs u and 1 - u next to each other. Anything but 'random' always uses the quantile method.
+        With arrays of parameters every parameter set is its own dimension of the sequence.
+        '''
+        if self.shape and np.shape(seed) == self.shape:
+            samples = self._row_samples(num, seed, method, uniforms, scramble)
+        else:
+            if seed is None:
+                rng = rng_unseeded
+            else:
+                rng = np.random.default_rng(seed) #Sets a new seed
+            samples = self._draw_samples(num, rng, method, uniforms, scramble)
+
+        if out is None:
+            if dtype is None:
+                dtype = self._default_dtype()
+            return samples.astype(dtype, copy=False)
+        out[...] = samples #Writes into the given buffer, casting to its type
+        return out
+
+    def _row_samples(self, num, seeds, method, uniforms, scramble):
+        '''
+        Samples every parameter set with its own seed, through the distribution with just those parameters
+        '''
+        seeds = np.asarray(seeds, dtype=object)
+        samples = np.empty((num,) + self.shape, dtype=self._default_dtype())
+        for index in np.ndindex(self.shape):
+            rng = np.random.default_rng(seeds[index])
+            samples[(slice(None),) + index] = self.find_parameter_set(index)._draw_samples(num, rng, method, uniforms, scramble)
+        return samples
+
+    def take_parallel_samples(self, num, seed=None, workers=None, chunk_size=None, executor='thread', method='quantile', dtype=None):
+        '''
+        Takes num samples split into chunks, which are shared out between 'workers' threads (or processes if executor = 'process').
+        Every chunk gets its own random number stream, spawned from one numpy SeedSequence made from the seed, so the streams are independent
+        and each chunk only depends on its position. For a given seed and chunk size the result is the same however the chunks are scheduled.
+        chunk_size defaults to num split evenly between the workers, and workers defaults to the number of CPUs.
+        'method' and 'dtype' mean the same as in take_multiple_samples.
         '''
-        This takes a sample of given size and optional seed.
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = max(1, -(-num // workers)) #Rounds up so there are at most 'workers' chunks
+        if dtype is None:
+            dtype = self._default_dtype()
+        if isinstance(seed, np.random.SeedSequence):
+            seed_sequence = seed
+        else:
+            seed_sequence = np.random.SeedSequence(seed)
+        starts = range(0, num, chunk_size)
+        streams = seed_sequence.spawn(len(starts))
+        result = np.empty((num,) + self.shape, dtype=dtype)
+
+        _sample_chunk(self, seed_sequence, 0, method) #Makes any cached tables once, before the workers share them
+        if executor == 'process':
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        else:
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        with pool:
+            chunks = [pool.submit(_sample_chunk, self, stream, min(chunk_size, num - start), method) for start, stream in zip(starts, streams)]
+            for start, chunk in zip(starts, chunks):
+                samples = chunk.result()
+                result[start:start + len(samples)] = samples
+        return result
+
+    def take_sample_chunks(self, num, chunk_size, seed=None, method='quantile', dtype=None, reuse_buffer=True):
+        '''
+        A generator giving num samples as numpy arrays of chunk_size samples (the last one can be shorter), for when they don't all fit in memory.
+        Every chunk comes from the same seeded random number stream, so joining the chunks together gives the same result for a given seed and chunk size.
+        With reuse_buffer the same array is written over for every chunk, so copy a chunk if it needs to be kept after the next one is made.
+        'method' and 'dtype' mean the same as in take_multiple_samples.
         '''
-        result = [] #Creates a list to be used later
         if seed is None:
-            for n in range(num):
-                sample = self.take_sample()
-                if self.IsDiscrete:
-                    result.append(sample)
-                else:
-                    result.append(float(sample))
+            rng = rng_unseeded
         else:
-            rng_seeded = np.random.default_rng(seed) #Sets a new seed
-            for n in range(num): #This part is very similar to in take_sample
-                y = rng_seeded.random()
-                sample = self.find_quantile(y)
-                if self.IsDiscrete:
-                    result.append(sample)
-                else:
-                    result.append(float(sample))
-        
-        return(result)
+            rng = np.random.default_rng(seed) #Sets a new seed
+        if dtype is None:
+            dtype = self._default_dtype()
+        buffer = np.empty((min(chunk_size, num),) + self.shape, dtype=dtype)
+        for start in range(0, num, chunk_size):
+            size = min(chunk_size, num - start)
+            if reuse_buffer:
+                chunk = buffer[:size]
+            else:
+                chunk = np.empty((size,) + self.shape, dtype=dtype)
+            chunk[...] = self._draw_samples(size, rng, method)
+            yield chunk
 
-        
-    
-    def draw_CDF(self, n = 50, safe = False):
+    def write_samples(self, path, num, chunk_size=2 ** 20, seed=None, method='quantile', dtype=None, format='npy'):
         '''
-        Draws the CDF graph. 
-        It does this by systematically going from 0 - 1 then using that number as the y-axis, plots points for continuous functions.
-        For discrete functions, it will plot n + 1 points and stop the graph there.
-        The default n is 50, as this ensures a smooth CDF graph for the continuous functions.
+        Writes num samples to a file one chunk at a time, so only one chunk is ever in memory.
+        format = 'npy' writes a .npy file through a memory map, which np.load(path, mmap_mode='r') can open again without reading it all in.
+        format = 'binary' writes the raw values one after another in the machine's byte order, for np.fromfile or other programs.
+        The samples are the same as take_sample_chunks gives with the same seed and chunk size. Returns the path.
+        '''
+        if dtype is None:
+            dtype = self._default_dtype()
+        chunks = self.take_sample_chunks(num, chunk_size, seed, method, dtype)
+        if format == 'npy':
+            stored = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(num,) + self.shape)
+            start = 0
+            for chunk in chunks:
+                stored[start:start + len(chunk)] = chunk
+                start += len(chunk)
+            stored.flush()
+            del stored #Closes the memory map
+        elif format == 'binary':
+            with open(path, 'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk.tobytes())
+        else:
+            print("Unknown file format " + str(format) + ". It must be 'npy' or 'binary'.")
+        return path
 
-        The 'safe' parameter rounds everything in piecewise discrete distributions (such as the uniform discrete distribution) to 6 dp when calculating the x values, and checks the x value rounded to 5 dp against the step rounded to 5 dp. This is to be absolutely safe from floating point errors and will rarely be used.
-        Because of the nature of the 'safe' parameter, if it is set to true, the function will not be as good at handling numbers where decimal places after the 5th are significant to the distribution.
+    def _draw_samples(self, num, rng, method, uniforms='random', scramble=True):
+        '''
+        Makes num samples with the chosen sampling method and uniform numbers, which every way of taking samples goes through
+        '''
+        if uniforms != 'random' and uniforms in _UNIFORMS:
+            return self._quantile_array(_uniform_draws(uniforms, num, self.shape, rng, scramble))
+        if uniforms != 'random':
+            print("Unknown uniform numbers " + str(uniforms) + ". They must be one of " + ", ".join(_UNIFORMS) + ", so 'random' will be used instead.")
+        if method == 'alias' and self.IsDiscrete and not self.shape: #The alias table needs single numbers as parameters
+            return self._alias_samples(num, rng)
+        if method != 'quantile':
+            print("The sampling method " + str(method) + " can't be used with this distribution, so the quantile method will be used instead.")
+        return self._find_samples(num, rng)
+
+    def _find_samples(self, num, rng):
+        '''
+        Makes num samples at once from the given numpy generator. This is inverse transform sampling, so
+        the uniform numbers are drawn in the same order as take_sample would draw them one at a time.
+        Distributions which don't sample through their quantile override this.
+        '''
+        return self._quantile_array(rng.random((num,) + self.shape))
+
+    def _default_dtype(self):
+        '''
+        The type used for arrays of samples when none is asked for
+        '''
+        if self.IsDiscrete:
+            return np.int64
+        return np.float64
+
+    def find_log_PDF(self, x):
+        '''
+        The natural log of the PDF at x, which can be a number or a numpy array. It is -inf where the PDF is 0.
+        Distributions whose PDF can overflow or underflow work this out directly in logs, and the rest take the log of find_PDF
+        '''
+        with np.errstate(divide='ignore'):
+            return _to_float64(np.log(np.asarray(self.find_PDF(x), dtype=np.float64)))
+
+    def find_log_CDF(self, x):
+        '''
+        The natural log of the CDF at x, which can be a number or a numpy array. It is -inf where the CDF is 0
+        '''
+        with np.errstate(divide='ignore'):
+            return _to_float64(np.log(np.asarray(self.find_CDF(x), dtype=np.float64)))
+
+    @property
+    def pdf(self):
+        '''
+        The sympy formula for the PDF in terms of x. It is only worked out the first time it is used, and then kept
+        '''
+        return self._symbolic_form('pdf', self._build_pdf)
+
+    @property
+    def cdf(self):
+        '''
+        The sympy formula for the CDF in terms of x. It is only worked out the first time it is used, and then kept
+        '''
+        return self._symbolic_form('cdf', self._build_cdf)
+
+    @property
+    def quantile(self):
+        '''
+        The sympy formula for the quantile in terms of x. It is only worked out the first time it is used, and then kept
+        '''
+        return self._symbolic_form('quantile', self._build_quantile)
+
+    def _symbolic_form(self, name, build):
+        '''
+        Gives the stored sympy formula with the given name, building it first if this is the first time it has been asked for.
+        Building these (integrals and summations especially) is slow, which is why it isn't done when the distribution is made.
+        The formulas need single numbers as parameters, so a parameter grid gives None
+        '''
+        if self._has_parameter_grid(name):
+            return None
+        if self._symbolic is None:
+            self._symbolic = {}
+        if name not in self._symbolic:
+            if _PROFILE is not None:
+                _PROFILE.flag_symbolic(self, name)
+            self._symbolic[name] = build()
+        return self._symbolic[name]
+
+    def _cdf_table(self):
+        '''
+        For discrete distributions on the whole numbers. Gives the first whole number in the table, then the probability and the CDF of every whole number from there on.
+        The table is made the first time it is needed and then kept, so each quantile afterwards is a binary search instead of adding up the PDF from 0.
+        The probabilities come from _log_pmf so large parameters don't overflow, and the CDF is their running total.
+        The range covered by _table_range leaves out less probability than float precision can show, so the CDF is scaled to end at exactly 1.
+        '''
+        if self._table is None:
+            start, stop = self._table_range()
+            pmf = np.exp(self._log_pmf(np.arange(start, stop + 1)))
+            pmf /= pmf.sum()
+            cdf = np.cumsum(pmf)
+            cdf[-1] = 1.0
+            self._table = (start, pmf, cdf)
+        return self._table
+
+    def _uses_table(self, p):
+        '''
+        Whether the quantiles of p should come from the CDF table. Making the table takes a moment for every whole number in it, while the guided search
+        takes a few scipy calls for every value of p, so the table is only made when there are enough values for it to pay off, and never when it would be huge.
+        Once it has been made it is always used
+        '''
+        if self._table is not None:
+            return True
+        start, stop = self._table_range()
+        return stop - start < min(_MAX_TABLE_SIZE, max(2 ** 12, 64 * np.size(p)))
+
+    def _table_quantile(self, p):
+        '''
+        The first whole number n with p < CDF(n), found by a binary search of the table
+        '''
+        start, pmf, cdf = self._cdf_table()
+        return start + np.minimum(np.searchsorted(cdf, p, side='right'), len(cdf) - 1)
+
+    def _table_CDF(self, x):
+        '''
+        The CDF looked up in the table, for a number or a numpy array
+        '''
+        start, pmf, cdf = self._cdf_table()
+        i = np.floor(np.asarray(x, dtype=np.float64)) - start
+        looked_up = cdf[np.clip(np.nan_to_num(i), 0, len(cdf) - 1).astype(np.int64)]
+        return np.where(i < 0, 0, looked_up)
+
+    def _alias_samples(self, num, rng):
+        '''
+        Walker's alias method. One random number picks a column of the table and its fractional part decides between
+        the column's own value and its alias, so every sample takes the same time.
+        '''
+        if self._alias is None:
+            self._alias = _build_alias_table(self._support_pmf())
+        prob, alias = self._alias
+        scaled = rng.random(num) * len(prob)
+        column = np.minimum(scaled.astype(np.int64), len(prob) - 1)
+        picked = np.where(scaled - column < prob[column], column, alias[column])
+        return self._support_values(picked)
+
+    def _support_pmf(self):
+        '''
+        The probability of every value the alias table can give, which for whole number distributions is the CDF table
+        '''
+        return self._cdf_table()[1]
+
+    def _support_values(self, i):
+        '''
+        Turns positions in _support_pmf into the values they stand for
         '''
-        y_plot = [] #just creating tuples which are later appended to
-        x_plot = []
+        return self._cdf_table()[0] + i
+
+    def check_moments(self, samples):
+        '''
+        Compares the mean and variance of some samples with the distribution's mean and var.
+        samples can be a numpy array (or list) or an iterable of chunks such as take_sample_chunks gives, and is only gone through once,
+        combining each chunk's mean and variance with Chan's formula so large sample sets are never held in memory at once.
+        Gives a dictionary with the count, the sample mean and (unbiased) variance, the distribution's mean and var,
+        and mean_z, how many standard errors the sample mean is from the mean.
+        '''
+        if self._has_parameter_grid('check_moments'):
+            return None
+        count = 0
+        sample_mean = 0.0
+        squares = 0.0 #The sum of squared differences from the mean so far
+        for chunk in _sample_chunks(samples):
+            size = chunk.size
+            if size == 0:
+                continue
+            chunk_mean = chunk.mean()
+            chunk_squares = ((chunk - chunk_mean) ** 2).sum()
+            difference = chunk_mean - sample_mean
+            total = count + size
+            sample_mean += difference * size / total
+            squares += chunk_squares + difference ** 2 * count * size / total
+            count = total
+        sample_var = squares / (count - 1) if count > 1 else np.nan
+        mean_z = (sample_mean - self.mean) / np.sqrt(self.var / count) if count > 0 else np.nan
+        return {'count': count, 'sample_mean': float(sample_mean), 'sample_var': float(sample_var),
+                'mean': self.mean, 'var': self.var, 'mean_z': float(mean_z)}
+
+    def find_KS_statistic(self, samples, bins=2 ** 16):
+        '''
+        The Kolmogorov-Smirnov statistic of some samples against find_CDF, with its (asymptotic) p-value, as a dictionary.
+        samples can be a numpy array (or list) or an iterable of chunks. Each sample's CDF value is counted into one of 'bins' equal bins of [0, 1]
+        in a single pass, and the statistic is found from those counts, which makes it accurate to about 1 / bins.
+        With bins = None and an array, the samples are sorted and the exact statistic is found instead.
+        For discrete distributions both CDFs only step at the values the distribution can take, so the samples are counted at each of those values
+        and the statistic is exact whatever bins is. The p-value is then conservative (the real one is a bit higher).
+        '''
+        if self._has_parameter_grid('find_KS_statistic'):
+            return None
+        if self.IsDiscrete:
+            counts = self._support_counts(samples)
+            count = counts.sum()
+            statistic = np.abs(np.cumsum(counts) / count - np.cumsum(self._support_pmf())).max()
+        elif bins is None:
+            sorted_samples = np.sort(np.asarray(samples, dtype=np.float64))
+            count = len(sorted_samples)
+            cdf = self.find_CDF(sorted_samples)
+            above = np.arange(1, count + 1) / count - cdf
+            below = cdf - np.arange(count) / count
+            statistic = max(above.max(), below.max())
+        else:
+            counts = self._CDF_bin_counts(samples, bins)
+            count = counts.sum()
+            empirical = np.concatenate(([0], np.cumsum(counts))) / count #The ECDF at each bin edge
+            statistic = np.abs(empirical - np.linspace(0, 1, bins + 1)).max()
+        return {'statistic': float(statistic), 'p_value': float(kolmogorov(np.sqrt(count) * statistic)), 'count': int(count)}
+
+    def find_chi_squared_statistic(self, samples, min_expected=5):
+        '''
+        Pearson's chi squared goodness of fit test for discrete distributions, as a dictionary of the statistic, its degrees of freedom and p-value.
+        samples can be a numpy array (or list) or an iterable of chunks, and is counted up in one pass.
+        Neighbouring values are grouped together until each group expects at least min_expected samples.
+        '''
+        if self._has_parameter_grid('find_chi_squared_statistic'):
+            return None
+        if not self.IsDiscrete:
+            print("The chi squared test can only be used with discrete distributions.")
+            return None
+        pmf = self._support_pmf()
+        counts = self._support_counts(samples)
+        count = counts.sum()
+        expected = pmf * count
+        observed_groups = []
+        expected_groups = []
+        observed_total = 0
+        expected_total = 0
+        for observed_value, expected_value in zip(counts, expected):
+            observed_total += observed_value
+            expected_total += expected_value
+            if expected_total >= min_expected:
+                observed_groups.append(observed_total)
+                expected_groups.append(expected_total)
+                observed_total = 0
+                expected_total = 0
+        if expected_groups: #Whatever is left over goes into the last group
+            observed_groups[-1] += observed_total
+            expected_groups[-1] += expected_total
+        observed_groups = np.array(observed_groups, dtype=np.float64)
+        expected_groups = np.array(expected_groups)
+        statistic = ((observed_groups - expected_groups) ** 2 / expected_groups).sum()
+        dof = len(expected_groups) - 1
+        p_value = chdtrc(dof, statistic) if dof > 0 else np.nan
+        return {'statistic': float(statistic), 'dof': dof, 'p_value': float(p_value), 'count': int(count)}
+
+    def _support_index(self, x):
+        '''
+        Turns values into positions in _support_pmf
+        '''
+        return np.asarray(x).astype(np.int64) - self._cdf_table()[0]
+
+    def _CDF_bin_counts(self, samples, bins):
+        '''
+        How many samples have their CDF value in each of 'bins' equal bins of [0, 1], counted one chunk at a time
+        '''
+        counts = np.zeros(bins, dtype=np.int64)
+        for chunk in _sample_chunks(samples):
+            positions = np.minimum((self.find_CDF(chunk) * bins).astype(np.int64), bins - 1)
+            counts += np.bincount(positions, minlength=bins)
+        return counts
+
+    def _support_counts(self, samples):
+        '''
+        For discrete distributions, how many samples there are of each value in _support_pmf, counted one chunk at a time.
+        Values off the ends of the table are counted at the ends
+        '''
+        size = len(self._support_pmf())
+        counts = np.zeros(size, dtype=np.int64)
+        for chunk in _sample_chunks(samples):
+            positions = np.clip(self._support_index(chunk), 0, size - 1)
+            counts += np.bincount(positions, minlength=size)
+        return counts
+
+    def _seen_support(self, samples):
+        '''
+        The values from the smallest to the largest one in the samples, and how many samples there are of each
+        '''
+        counts = self._support_counts(samples)
+        seen = np.flatnonzero(counts)
+        first, last = (seen[0], seen[-1] + 1) if len(seen) else (0, 0)
+        return self._support_values(np.arange(first, last)), counts[first:last], counts.sum()
+
+    def find_histogram(self, samples, bins=100, range=None):
+        '''
+        Counts samples into a histogram scaled the same way as the PDF, so the two can be compared. samples can be a numpy array (or list)
+        or an iterable of chunks such as take_sample_chunks gives, and is gone through once, so only the bins are kept in memory.
+        For continuous distributions it gives the edges of 'bins' equal bins across range = (low, high) and the height of each bin.
+        range defaults to the 0.001 and 0.999 quantiles, or to the smallest and largest of the first chunk when there is no quantile.
+        Samples outside the range still count towards the total, so the heights are the same scale as find_PDF.
+        For discrete distributions every value is its own bin, and it gives the values from the smallest to the largest sample and the proportion of samples at each.
+        '''
+        if self._has_parameter_grid('find_histogram'):
+            return None
+        if self.IsDiscrete:
+            values, counts, count = self._seen_support(samples)
+            return np.asarray(values, dtype=np.float64), counts / max(count, 1)
+        chunks = _sample_chunks(samples)
+        if range is None:
+            if self.HasQuantile:
+                range = (self.find_quantile(0.001), self.find_quantile(0.999))
+            else:
+                first = next(chunks, np.empty(0))
+                range = (first.min(), first.max()) if first.size else (0, 1)
+                chunks = itertools.chain([first], chunks)
+        low, high = float(range[0]), float(range[1])
+        counts = np.zeros(bins, dtype=np.int64)
+        count = 0
+        for chunk in chunks:
+            positions = np.floor((chunk - low) / (high - low) * bins)
+            inside = (positions >= 0) & (positions < bins) | (chunk == high) #The last bin includes its right edge
+            counts += np.bincount(np.minimum(positions[inside], bins - 1).astype(np.int64), minlength=bins)
+            count += chunk.size
+        edges = np.linspace(low, high, bins + 1)
+        return edges, counts / (max(count, 1) * (high - low) / bins)
+
+    def find_ECDF(self, samples, bins=2 ** 12):
+        '''
+        The empirical CDF of some samples, without sorting them or keeping them: samples can be a numpy array (or list) or an iterable of chunks,
+        and is gone through once, with only 'bins' counts kept in memory. Gives x values and the proportion of samples at or below each.
+        For continuous distributions the samples are counted by their CDF value into equal bins of [0, 1], and the x values are the quantiles
+        of the bin edges, so the ECDF is exact at those points and they are closest together where the samples are.
+        Without a quantile the x values are the edges of equal bins between the smallest and largest of the first chunk instead.
+        For discrete distributions it is exact at every value from the smallest to the largest sample.
+        '''
+        if self._has_parameter_grid('find_ECDF'):
+            return None
+        if self.IsDiscrete:
+            values, counts, count = self._seen_support(samples)
+            return np.asarray(values, dtype=np.float64), np.cumsum(counts) / max(count, 1)
+        if self.HasQuantile:
+            counts = self._CDF_bin_counts(samples, bins)
+            x = self.find_quantile(np.arange(1, bins) / bins)
+            return np.asarray(x, dtype=np.float64), np.cumsum(counts)[:-1] / max(counts.sum(), 1)
+        chunks = _sample_chunks(samples)
+        first = next(chunks, np.empty(0))
+        low, high = (first.min(), first.max()) if first.size else (0, 1)
+        counts = np.zeros(bins, dtype=np.int64)
+        for chunk in itertools.chain([first], chunks):
+            #Samples beyond the first chunk's range go in the end bins, which keeps the ECDF right at every edge in between
+            positions = np.clip(np.floor((chunk - low) / (high - low) * bins), 0, bins - 1).astype(np.int64)
+            counts += np.bincount(positions, minlength=bins)
+        return np.linspace(low, high, bins + 1)[1:], np.cumsum(counts) / max(counts.sum(), 1)
+
+    def find_sum_distribution(self, n, tol=1e-12):
+        '''
+        For discrete distributions, gives the distribution of the total of n independent samples as a discrete_table_distribution.
+        The PMF is raised to the n-th power with a fast Fourier transform over a window around the total's mean, which is doubled until less than tol
+        of the probability is near its edges, so this takes about the same time for n = 10 or n = 100000. Values at either end with less than tol / 2
+        of the probability between them are left out.
+        '''
+        if self._has_parameter_grid('find_sum_distribution'):
+            return None
+        if not self.IsDiscrete:
+            print("The sum distribution can only be found for discrete distributions.")
+            return None
+        if not (np.floor(n) == n and n >= 1):
+            print("Error: You did not enter a natural number for the number of samples to add up")
+            return None
+        n = int(n)
+        pmf = self._support_pmf()
+        first = self._support_values(0)
+        step = self._support_values(1) - first if len(pmf) > 1 else 1
+        index = np.arange(len(pmf))
+        index_mean = index @ pmf
+        mean = n * index_mean #The mean and sd of the total, counted in steps from n times the first value
+        sd = np.sqrt(n * (((index - index_mean) ** 2) @ pmf))
+        full = n * (len(pmf) - 1) + 1 #How many values the total can take
+        size = 2 ** int(np.ceil(np.log2(2 * (20 * sd + len(pmf)))))
+        while True:
+            if size >= full: #The whole range fits, so nothing wraps round and the result is exact
+                size = full
+                low = 0
+            else:
+                low = int(round(mean)) - size // 2
+            folded = np.bincount(index % size, weights=pmf, minlength=size)
+            sums = np.roll(np.fft.irfft(np.fft.rfft(folded) ** n, size), -low) #Position j is now the total of low + j steps
+            if size == full:
+                break
+            edge = size // 8
+            if sums[:edge].sum() + sums[-edge:].sum() < tol: #Anything wrapped round from outside the window is smaller still
+                break
+            size *= 2
+        sums = np.maximum(sums, 0) #Rounding errors in the transform can be just below 0
+        left = int(np.searchsorted(np.cumsum(sums), tol / 2 * sums.sum()))
+        right = len(sums) - int(np.searchsorted(np.cumsum(sums[::-1]), tol / 2 * sums.sum()))
+        start = n * first + (low + left) * step
+        if isinstance(start, (float, np.floating)) and float(start).is_integer() and isinstance(step, (int, np.integer)):
+            start = int(start)
+        return discrete_table_distribution(sums[left:right], start, step)
+
+    def _build_pdf(self):
+        raise AttributeError(type(self).__name__ + " has no symbolic pdf")
+
+    def _build_cdf(self):
+        raise AttributeError(type(self).__name__ + " has no symbolic cdf")
+
+    def _build_quantile(self):
+        raise AttributeError(type(self).__name__ + " has no symbolic quantile")
+
+    def curve_points(self, kind, n = 50, safe = False):
+        '''
+        Gives the x and y co-ordinates of the CDF (kind = 'CDF') or PDF (kind = 'PDF') graph as two numpy arrays, without drawing anything.
+        draw_CDF and draw_PDF plot exactly these points, and every point is worked out in one vectorised call.
+        Continuous distributions use n points spread evenly in probability through the quantile (n + 1 evenly spread x values for piecewise ones).
+        Discrete distributions use the whole numbers 0 to n, or for piecewise ones every step from 2 steps below the min to n past it.
+        'n' and 'safe' mean the same as in draw_CDF.
+        '''
+        if self._has_parameter_grid('curve_points'):
+            return None
+        if kind not in ('CDF', 'PDF'):
+            print("Unknown kind of graph " + str(kind) + ". It must be 'CDF' or 'PDF'.")
+            return None
         if not self.IsDiscrete:
             if not self.Piecewise:
                 if self.HasQuantile:
-                    for i in range(n):
-                        y = (i+1)/(n+1) # to ensure an even spread, this will be the y co-ordinate on the graph
-                        sample = self.find_quantile(y) #Applies the Quantile function to y, giving the x co-ordinate
-                        y_plot.append(y)
-                        x_plot.append(sample)
-                else: #No Quantile - This method is potentially very slow
-                    for i in range(n):
-                        x = self.take_sample()
-                        x_plot.append(x)
-                    x_plot.sort()
-                    for i in range(n):
-                        y = self.find_CDF(x_plot[i])
-                        y_plot.append(y)
+                    y = np.arange(1, n + 1) / (n + 1) #to ensure an even spread, this will be the y co-ordinate on the CDF graph
+                    x = self.find_quantile(y) #Applies the Quantile function to y, giving the x co-ordinate
+                else: #No Quantile - the x values are a sorted sample instead
+                    if _PROFILE is not None:
+                        _PROFILE.flag_symbolic(self, 'curve_points(sample and sort)')
+                    x = np.sort(self.take_multiple_samples(n).astype(np.float64))
+                    y = self.find_CDF(x)
+                if kind == 'PDF':
+                    y = self.find_PDF(x)
             else:
-                for i in range(n + 1):
-                    y = i / n
+                if kind == 'CDF':
+                    y = np.arange(n + 1) / n
                     x = self.find_quantile(y)
-                    y_plot.append(y)
-                    x_plot.append(x)
-            plt.plot(x_plot,y_plot)
+                else:
+                    x = np.arange(n + 1) * (self.max - self.min) / n + self.min
+                    y = self.find_PDF(x)
         else:
             if not self.Piecewise:
-                for i in range(n + 1):
-                    x_plot.append(i)
-                    y_plot.append(self.find_CDF(i))
+                x = np.arange(n + 1)
+                if kind == 'CDF':
+                    y = self.find_CDF(x)
+                else:
+                    y = self.find_PDF(x)
             else:
-                if safe:
-                    for i in range(int(n / self.step + 3)):
-                        x_plot.append(round((i * self.step + self.min - 2 * self.step),6))
-                        y_plot.append(self.find_CDF(i * self.step + self.min - 2 * self.step, safe = True))
+                decimals = 6 if safe else 10 #Rounding to avoid floating point errors in the x values
+                unrounded = np.arange(int(n / self.step + 3)) * self.step + self.min - 2 * self.step
+                x = np.round(unrounded, decimals)
+                if kind == 'CDF':
+                    y = self.find_CDF(unrounded, safe = safe)
                 else:
-                    for i in range(int(n / self.step + 3)):
-                        x_plot.append(round((i * self.step + self.min - 2 * self.step),10))
-                        y_plot.append(self.find_CDF(i * self.step + self.min - 2 * self.step))
+                    y = self.find_PDF(x, safe = safe)
+        return np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+    def draw_CDF(self, n = 50, safe = False):
+        '''
+        Draws the CDF graph. 
+        It does this by systematically going from 0 - 1 then using that number as the y-axis, plots points for continuous functions.
+        For discrete functions, it will plot n + 1 points and stop the graph there.
+        The default n is 50, as this ensures a smooth CDF graph for the continuous functions.
+        The points come from curve_points, which can be used on its own to get them without drawing.
+
+        The 'safe' parameter rounds everything in piecewise discrete distributions (such as the uniform discrete distribution) to 6 dp when calculating the x values, and checks the x value rounded to 5 dp against the step rounded to 5 dp. This is to be absolutely safe from floating point errors and will rarely be used.
+        Because of the nature of the 'safe' parameter, if it is set to true, the function will not be as good at handling numbers where decimal places after the 5th are significant to the distribution.
+        '''
+        points = self.curve_points('CDF', n, safe)
+        if points is None:
+            return
+        x_plot, y_plot = points
+        if self.IsDiscrete:
             plt.plot(x_plot,y_plot,'o')
+        else:
+            plt.plot(x_plot,y_plot)
         plt.show(block = False)
         
     def draw_PDF(self, n = 50, safe = False):
         '''
-        Draws the PDF graph. This takes about twice as long as the CDF graph.
+        Draws the PDF graph.
         It does the systematic approach from the CDF, then converts that into an X value, then finds the PDF.
         The default here is 50, as it's a good number for this because it ensures a smooth graph for continuous functions.
-        The 'n' input means the same thing as for the CDF
+        The 'n' input means the same thing as for the CDF, and the points come from curve_points in the same way
 
         The 'safe' parameter here is the same as in the draw_CDF function
         '''
-        y_plot = []
-        x_plot = []
-        if not self.IsDiscrete:
-            if not self.Piecewise:
-                if self.HasQuantile:
-                    for i in range(n):
-                        a = (i+1)/(n+1) # this ensures an even spread
-                        x = self.find_quantile(a) #finds the x co-ordinate like in CDF
-                        y = self.find_PDF(x) #finds the y co-ordinate
-                        y_plot.append(y)
-                        x_plot.append(x)
-                else: #No Quantile - This method is potentially very slow
-                    for i in range(n):
-                        x = self.take_sample()
-                        x_plot.append(x)
-                    x_plot.sort()
-                    for i in range(n):
-                        y = self.find_PDF(x_plot[i])
-                        y_plot.append(y)
-            else:
-                for i in range(n + 1):
-                    a = (i) * (self.max - self.min) / (n) + self.min
-                    x_plot.append(a)
-                    y_plot.append(self.find_PDF(a))
+        points = self.curve_points('PDF', n, safe)
+        if points is None:
+            return
+        x_plot, y_plot = points
+        if self.IsDiscrete:
+            plt.plot(x_plot,y_plot,'o')
+        else:
             plt.plot(x_plot,y_plot)
+        plt.show(block = False)
+    
+    def draw_histogram(self, samples, bins=100, range=None):
+        '''
+        Draws the histogram from find_histogram with the PDF over it. It only draws the bins, so it is just as quick for 10^9 samples as for 10^3,
+        and samples can be given as chunks in the same way
+        '''
+        points = self.find_histogram(samples, bins, range)
+        if points is None:
+            return
+        x_plot, heights = points
+        if self.IsDiscrete:
+            width = 0.8 * (np.min(np.diff(x_plot)) if len(x_plot) > 1 else 1)
+            plt.bar(x_plot, heights, width = width, alpha = 0.5)
+            plt.plot(x_plot, self.find_PDF(x_plot), 'o')
         else:
-            if not self.Piecewise:
-                for i in range(n + 1):
-                    x_plot.append(i)
-                    y_plot.append(self.find_PDF(i))
-            else:
-                if safe:
-                    for i in range(int(n / self.step + 3)):
-                        a = round((i * self.step + self.min - 2 * self.step),6) #for better readability, and it's rounded to 10 to avoid the floating point error
-                        x_plot.append(a)
-                        y_plot.append(self.find_PDF(a, safe = True))
-                else:
-                    for i in range(int(n / self.step + 3)):
-                        a = round((i * self.step + self.min - 2 * self.step),10) #for better readability, and it's rounded to 10 to avoid the floating point error
-                        x_plot.append(a)
-                        y_plot.append(self.find_PDF(a))
+            plt.stairs(heights, x_plot, fill = True, alpha = 0.5)
+            curve_x = np.linspace(x_plot[0], x_plot[-1], 200)
+            plt.plot(curve_x, self.find_PDF(curve_x))
+        plt.show(block = False)
 
-            plt.plot(x_plot,y_plot,'o')
+    def draw_ECDF(self, samples, bins=2 ** 12):
+        '''
+        Draws the empirical CDF from find_ECDF as steps, with the CDF over it
+        '''
+        points = self.find_ECDF(samples, bins)
+        if points is None:
+            return
+        x_plot, ecdf = points
+        plt.step(x_plot, ecdf, where = 'post')
+        if self.IsDiscrete:
+            plt.plot(x_plot, self.find_CDF(x_plot), 'o')
+        else:
+            plt.plot(x_plot, self.find_CDF(x_plot))
         plt.show(block = False)
-    
+
+    def take_linear_regression_samples(self, a, b, var, n, seed=None, replicates=None):
+        '''
+        Makes n rows of data for Y = a + bX + epsilon, where X follows this distribution and epsilon is normal with mean 0 and variance 'var'.
+        b can also be a list of coefficients, in which case X has one column per coefficient (each drawn from this distribution) and Y = a + X @ b + epsilon.
+        'replicates' adds a first axis of that many independent datasets. Everything is drawn in whole arrays from one seeded stream.
+        Returns X and Y as numpy arrays.
+        '''
+        if self._has_parameter_grid('take_linear_regression_samples'):
+            return None
+        if seed is None:
+            rng = rng_unseeded
+        else:
+            rng = np.random.default_rng(seed) #Sets a new seed
+        b = np.asarray(b, dtype=np.float64)
+        shape = (n,) if b.ndim == 0 else (n, len(b))
+        if replicates is not None:
+            shape = (replicates,) + shape
+        X = self._draw_samples(int(np.prod(shape)), rng, 'quantile').astype(np.float64).reshape(shape)
+        if b.ndim == 0:
+            signal = a + b * X
+        else:
+            signal = a + X @ b
+        Y = signal + np.sqrt(var) * rng.standard_normal(signal.shape)
+        return X, Y
+
     def draw_linear_regression(self,a,b,var,n):
         '''
         Displays a linear regression graph with Y = a + bX + epsilon error with 'var' variance
-        The distribution determines the spread of X values, and n values are created
-        '''
-        Normal_Epsilon = normal_distribution(0,var)
-        x_plt = []
-        y_plt = []
-        for i in range(n):
-            X = self.take_sample()
-            Y = X * b + a + Normal_Epsilon.take_sample()
-            x_plt.append(X)
-            y_plt.append(Y)
+        The distribution determines the spread of X values, and n values are created by take_linear_regression_samples
+        '''
+        points = self.take_linear_regression_samples(a,b,var,n)
+        if points is None:
+            return
+        x_plt, y_plt = points
         plt.plot(x_plt,y_plt,'o')
         plt.show(block = False)
             
         
         
 
+for _name in _PROFILED_METHODS: #The methods every distribution gets from Distribution itself
+    setattr(Distribution, _name, _profiled(Distribution.__dict__[_name]))
+del _name
+
 class normal_distribution(Distribution):
+    __slots__ = ()
+    IsDiscrete = False
+    Piecewise = False
+    HasQuantile = True
+
     def __init__(self,mean,var):
         '''
         This gives the distribution all the common information. You can call any of these, apart from x of course.
         Calling these attributes gives the value or a formula, depending on which you call
         '''
-        self.IsDiscrete = False
-        self.Piecewise = False
-        self.HasQuantile = True
+        mean = _parameter(mean)
+        var = _parameter(var)
         self.min = -np.inf
         self.max = np.inf
         self.mean = mean
         self.var = var
         self.sd = var ** (1 / 2) # this is a bit of a cheat I know...
+
+    def _build_pdf(self):
         x = sym.Symbol("x")
-        self.pdf = (1 / (self.sd * sym.sqrt(2 * sym.pi))) * sym.exp(-(1 / 2) * ((x - mean) / self.sd) ** 2) 
-        self.cdf = (1 / 2) + (1 / 2) * sym.erf((x - mean) / (self.sd * sym.sqrt(2)))
-        self.quantile = self.mean + self.sd * sym.sqrt(2) * sym.erfinv(2 * x - 1)
-        
-    def find_PDF(self,x):
+        return (1 / (self.sd * sym.sqrt(2 * sym.pi))) * sym.exp(-(1 / 2) * ((x - self.mean) / self.sd) ** 2)
+
+    def _build_cdf(self):
+        x = sym.Symbol("x")
+        return (1 / 2) + (1 / 2) * sym.erf((x - self.mean) / (self.sd * sym.sqrt(2)))
+
+    def _build_quantile(self):
+        x = sym.Symbol("x")
+        return self.mean + self.sd * sym.sqrt(2) * sym.erfinv(2 * x - 1)
+
+    def find_PDF(self,x,symbolic = False):
         """
-        This finds the distributions probability density function at a given value of x
+        This finds the distributions probability density function at a given value of x.
+        x can be a number or a numpy array, and the result is a float64 (or an array of them).
+        Setting symbolic to True gives the exact sympy value instead.
         """
-        return (1 / (self.sd * sym.sqrt(2 * sym.pi))) * sym.exp(-(1 / 2) * ((x - self.mean) / self.sd) ** 2)
-    def find_CDF(self, x):
+        if symbolic:
+            return (1 / (self.sd * sym.sqrt(2 * sym.pi))) * sym.exp(-(1 / 2) * ((x - self.mean) / self.sd) ** 2)
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.exp(-0.5 * ((x - self.mean) / self.sd) ** 2) / (self.sd * np.sqrt(2 * np.pi)))
+    def find_CDF(self,x,symbolic = False):
         """
-        This finds the distributions cumulative density function at a given value of x
+        This finds the distributions cumulative density function at a given value of x.
+        x can be a number or a numpy array. Setting symbolic to True gives the exact sympy value instead.
         """
-        return ((1 / 2) + (1 / 2) * sym.erf((x - self.mean) / (self.sd * sym.sqrt(2))))
-    def find_quantile(self,p):
+        if symbolic:
+            return ((1 / 2) + (1 / 2) * sym.erf((x - self.mean) / (self.sd * sym.sqrt(2))))
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(ndtr((x - self.mean) / self.sd))
+    def find_log_PDF(self,x):
+        """
+        The log of the PDF, which stays accurate far out in the tails where the PDF itself is 0 as a float
+        """
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(-0.5 * ((x - self.mean) / self.sd) ** 2 - np.log(self.sd) - 0.5 * np.log(2 * np.pi))
+    def find_log_CDF(self,x):
+        """
+        The log of the CDF, using scipy's log_ndtr so the far left tail doesn't underflow
         """
-        This finds the distributions quantile at a given value x
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(log_ndtr((x - self.mean) / self.sd))
+    def find_quantile(self,p,symbolic = False):
         """
-        if p < 0 or p > 1:
+        This finds the distributions quantile at a given value x.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
+        Setting symbolic to True gives the exact sympy value instead.
+        """
+        if np.ndim(p) == 0 and (p < 0 or p > 1):
             print("Invalid number inputted into the Normal Distribution Quantile Function. This will now return the value 1. The number inputted to the Normal Distribution Quantile Function was: " + str(p))
             return 1
-        else:
+        elif symbolic:
             return self.mean + self.sd * sym.sqrt(2) * sym.erfinv(2 * p - 1)
+        else:
+            return _to_float64(self._quantile_array(_valid_probabilities(p)))
+
+    def _quantile_array(self,p):
+        '''
+        The quantile for a numpy array of values in [0,1). ndtri(p) is the same as sqrt(2) * erfinv(2p - 1)
+        '''
+        return self.mean + self.sd * ndtri(p)
 
 class exponential_distribution(Distribution):
+    __slots__ = ('rate',)
+    IsDiscrete = False
+    Piecewise = False
+    HasQuantile = True
+
     def __init__(self,l):
         '''
         This gives the distribution all the common information. You can call any of these, apart from x of course.
         Calling these attributes gives the value or a formula, depending on which you call
         '''
-        self.IsDiscrete = False
-        self.Piecewise = False
-        self.HasQuantile = True
+        l = _parameter(l)
         self.min = 0
         self.max = np.inf
         self.mean = 1 / l
         self.var = 1 / (l ** 2)
         self.sd = 1 / l
-        x = sym.Symbol("x")
-        self.pdf = l * sym.exp(- l * x)
-        self.cdf = 1 - sym.exp(- l * x)
-        self.quantile = -sym.ln(1 - x) / l
-        
+        self.rate = l
+
         '''
         These functions (find_PDF and find_quantile) are technically not needed, as we can just use sympy.subs on the pdf and cdf,
         however the use of these functions causes the graphs to appear a lot quicker.
         '''
-    def find_PDF(self,x):
+
+    def _build_pdf(self):
+        x = sym.Symbol("x")
+        return self.rate * sym.exp(- self.rate * x)
+
+    def _build_cdf(self):
+        x = sym.Symbol("x")
+        return 1 - sym.exp(- self.rate * x)
+
+    def _build_quantile(self):
+        x = sym.Symbol("x")
+        return -sym.ln(1 - x) / self.rate
+
+    def find_PDF(self,x,symbolic = False):
         """
-        This finds the distributions probability density function at a given value of x
+        This finds the distributions probability density function at a given value of x.
+        x can be a number or a numpy array, and the result is a float64 (or an array of them).
+        Setting symbolic to True gives the exact sympy value instead.
         """
-        if not x > 0:
-            return 0
-        return (1/self.mean) * sym.exp(- (1/self.mean) * x)
-    def find_CDF(self, x):
+        if symbolic:
+            if not x > 0:
+                return 0
+            return (1/self.mean) * sym.exp(- (1/self.mean) * x)
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.where(x > 0, np.exp(-x / self.mean) / self.mean, 0))
+    def find_CDF(self,x,symbolic = False):
         """
-        This finds the distributions cumulative density function at a given value of x
+        This finds the distributions cumulative density function at a given value of x.
+        x can be a number or a numpy array. Setting symbolic to True gives the exact sympy value instead.
         """
-        if not x > 0:
-            return 0
-        return (1 - sym.exp(- 1/self.mean * x))
-    def find_quantile(self,p):
+        if symbolic:
+            if not x > 0:
+                return 0
+            return (1 - sym.exp(- 1/self.mean * x))
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.where(x > 0, -np.expm1(-x / self.mean), 0))
+    def find_log_PDF(self,x):
+        """
+        The log of the PDF, which is -inf where x isn't above 0
+        """
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.where(x > 0, -np.log(self.mean) - x / self.mean, -np.inf))
+    def find_log_CDF(self,x):
         """
-        This finds the distributions quantile at a given value x
+        The log of the CDF, which is -inf where x isn't above 0
         """
-        if p < 0 or p > 1:
+        x = np.asarray(x, dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            return _to_float64(np.where(x > 0, np.log(-np.expm1(-np.maximum(x, 0) / self.mean)), -np.inf))
+    def find_quantile(self,p,symbolic = False):
+        """
+        This finds the distributions quantile at a given value x.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
+        Setting symbolic to True gives the exact sympy value instead.
+        """
+        if np.ndim(p) == 0 and (p < 0 or p > 1):
             print("Invalid number inputted into the Exponential Distribution Quantile Function. This will now return the value 1. The number inputted to the Exponential Distribution Quantile Function was: " + str(p))
             return 1
-        else:
+        elif symbolic:
             return -sym.ln(1 - p) * self.mean
+        else:
+            return _to_float64(self._quantile_array(_valid_probabilities(p)))
+
+    def _quantile_array(self,p):
+        '''
+        The quantile for a numpy array of values in [0,1)
+        '''
+        return -np.log1p(-p) * self.mean
 
 
 class poisson_distribution(Distribution):
+    __slots__ = ()
+    IsDiscrete = True
+    Piecewise = False
+    HasQuantile = True
+
     def __init__(self,l):
         '''
         This gives the distribution all the common information. You can call any of these, apart from x of course.
         Calling these attributes gives the value or a formula, depending on which you call
         '''
-        self.IsDiscrete = True
-        self.Piecewise = False
-        self.HasQuantile = True
+        l = _parameter(l)
         self.min = 0
         self.max = np.inf
         self.mean = l
         self.var = l
-        self.sd = sym.sqrt(l)
+        self.sd = np.sqrt(l)
+
+    def _build_pdf(self):
+        x = sym.Symbol("x")
+        return self.mean ** x * sym.exp(-self.mean) / sym.factorial(x)
+
+    def _build_cdf(self):
         x = sym.Symbol("x")
         k = sym.Symbol("k")
-        self.pdf = l ** x * sym.exp(-l) / sym.factorial(x)
-        self.cdf = sym.exp(-l) * sym.summation(((l ** k ) / sym.factorial(k) ),(k,0,sym.floor(x)))
+        return sym.exp(-self.mean) * sym.summation(((self.mean ** k ) / sym.factorial(k) ),(k,0,sym.floor(x)))
 
-    def find_PDF(self,x):
+    def find_PDF(self,x,symbolic = False):
         """
-        This finds the distributions probability density function at a given value of x
+        This finds the distributions probability density function at a given value of x.
+        x can be a number or a numpy array, and the result is a float64 (or an array of them) which is 0 away from the whole numbers.
+        Setting symbolic to True gives the exact sympy value instead.
         """
-        if not x > 0:
-            return 0
-        return self.mean ** x * sym.exp(-self.mean) / sym.factorial(x)
-    def find_CDF(self,x):
+        if symbolic:
+            if not x > 0:
+                return 0
+            return self.mean ** x * sym.exp(-self.mean) / sym.factorial(x)
+        return _to_float64(np.exp(self.find_log_PDF(x))) #Done in logs so large x doesn't overflow
+    def find_log_PDF(self,x):
         """
-        This finds the distributions cumulative density function at a given value of x
+        The log of the PDF, using gammaln for log(x!) so there are no huge factorials. It is -inf away from the whole numbers
         """
-        if not x > 0:
-            return 0
-        k = sym.Symbol("k")
-        return sym.exp(-self.mean) * sym.summation(((self.mean ** k ) / sym.factorial(k) ),(k,0,sym.floor(x)))
-    def find_quantile(self,p):
+        x = np.asarray(x, dtype=np.float64)
+        whole = (x >= 0) & (np.floor(x) == x)
+        return _to_float64(np.where(whole, self._log_pmf(np.where(whole, x, 0)), -np.inf))
+    def find_CDF(self,x,symbolic = False):
+        """
+        This finds the distributions cumulative density function at a given value of x.
+        x can be a number or a numpy array. Setting symbolic to True gives the exact sympy value instead.
+        """
+        if symbolic:
+            if not x > 0:
+                return 0
+            k = sym.Symbol("k")
+            return sym.exp(-self.mean) * sym.summation(((self.mean ** k ) / sym.factorial(k) ),(k,0,sym.floor(x)))
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.where(x >= 0, pdtr(np.floor(np.maximum(x, 0)), self.mean), 0))
+    def find_quantile(self,p,symbolic = False):
         """
-        This finds the distributions quantile at a given value x
+        This finds the distributions quantile at a given value x.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
+        Setting symbolic to True uses the sympy CDF instead.
         """
         Found = False
         n = 0
-        if p < 0 or p > 1 or p == 1:
+        if np.ndim(p) == 0 and not 0 <= p < 1: #Also catches nan, which the table would otherwise turn into its last value
             print("Invalid number inputted into the Poisson Distribution Quantile Function. This will now return the value 1. The number inputted to the Poisson Distribution Quantile Function was: " + str(p))
             return 1
+        if not symbolic:
+            p = np.asarray(p, dtype=np.float64)
+            if p.ndim == 0 and not self.shape:
+                return int(self._quantile_array(p))
+            valid = (p >= 0) & (p < 1)
+            return np.where(valid, self._quantile_array(np.where(valid, p, 0)), np.nan)
         '''
         This is for discrete and piecewise distributions only. It checks if the given is less than the cdf for n starting 
         from 0 until the end is found. If the given value is 1, this will go on forever.
@@ -323,26 +1308,72 @@ class poisson_distribution(Distribution):
                 n = n + 1
 
         return int(n)
+
+    def _quantile_array(self,p):
+        '''
+        The quantile for a numpy array of values in [0,1), from a binary search of the cached CDF table when _uses_table says it is worth making.
+        Otherwise, and with an array of lambdas where there is no single table, a guess from _quantile_guess is corrected by a guided search,
+        which takes the same time for any lambda
+        '''
+        if self.shape or not self._uses_table(p):
+            return _discrete_quantile_search(p, self._quantile_guess(p), lambda k: pdtr(k, self.mean), self.max)
+        return self._table_quantile(p)
+
+    def _quantile_guess(self,p):
+        '''
+        The Cornish-Fisher guess, using the Poisson skew of 1/sd and excess kurtosis of 1/lambda
+        '''
+        sd = np.asarray(self.sd, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'): #lambda = 0 has no skew, and its guess of nan is replaced by 0
+            return _cornish_fisher_guess(p, self.mean, sd, 1 / sd, 1 / sd ** 2)
+
+    def _log_pmf(self,k):
+        '''
+        The log of the probability of each whole number k >= 0
+        '''
+        return xlogy(k, self.mean) - self.mean - gammaln(k + 1)
+
+    def _table_range(self):
+        '''
+        10 standard deviations either side of the mean, plus 10 so small lambdas have room. The tails left out are below 1e-20 (see find_truncation_error)
+        '''
+        start = max(0, int(np.floor(self.mean - 10 * self.sd - 10)))
+        stop = int(np.ceil(self.mean + 10 * self.sd + 10))
+        return start, stop
+
+    def find_truncation_error(self):
+        '''
+        The probability the Poisson distribution gives to the numbers left out of its CDF and alias tables.
+        The tables are scaled up to add to 1 without them, so the table quantile and alias samplers differ from the exact distribution
+        by at most this much in total variation. It is below 1e-20 for every lambda, far under float precision (about 1e-16).
+        Quantiles found by the guided search instead of the table (see _uses_table) leave nothing out.
+        '''
+        start, stop = self._table_range()
+        below = pdtr(start - 1, self.mean) if start > 0 else 0
+        return float(below + pdtrc(stop, self.mean))
         
 
 class continuous_uniform_distribution(Distribution):
+    __slots__ = ()
+    IsDiscrete = False
+    Piecewise = True
+    HasQuantile = True
+
     def __init__(self,a,b):
         '''
         This gives the distribution all the common information. You can call any of these, apart from x of course.
         Calling these attributes gives the value or a formula, depending on which you call
         '''
-        if not b > a:
+        a = _parameter(a)
+        b = _parameter(b)
+        if not np.all(b > a):
             print("Invalid Parameters. The second number must be greater than the first.")
         else:
-            self.IsDiscrete = False
-            self.Piecewise = True
-            self.HasQuantile = True
             self.mean = (a + b) / 2
-            self.var = (b - a) / 12
-            self.sd = sym.sqrt(self.var)
+            self.var = (b - a) ** 2 / 12
+            self.sd = np.sqrt(self.var)
             self.max = b
             self.min = a
-            x = sym.Symbol("x")
         
         '''
         These functions (find_PDF and find_quantile) are technically not needed, as we can just use sympy.subs on the pdf and cdf,
@@ -350,214 +1381,573 @@ class continuous_uniform_distribution(Distribution):
         '''
     def find_PDF(self,x):
         """
-        This finds the distributions probability density function at a given value of x
+        This finds the distributions probability density function at a given value of x, which can be a number or a numpy array
         """
-        if x < self.min:
-            return 0
-        elif x > self.max:
-            return 0
-        else:
-            return 1 / (self.max - self.min)
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.where((x < self.min) | (x > self.max), 0, 1 / (self.max - self.min)))
     def find_CDF(self,x):
         """
-        This finds the distributions cumulative density function at a given value of x
-        """
-        if x < self.min:
-            return 0
-        elif x > self.max:
-            return 1
-        else:
-            return (x - self.min) / (self.max - self.min)
+        This finds the distributions cumulative density function at a given value of x, which can be a number or a numpy array
+        """
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.clip((x - self.min) / (self.max - self.min), 0, 1))
     def find_quantile(self,p):
         """
-        This finds the distributions quantile at a given value x
+        This finds the distributions quantile at a given value x.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
         """
-        if p < 0 or p > 1:
+        if np.ndim(p) == 0 and (p < 0 or p > 1):
             print("Invalid number inputted into the Continuous Uniform Distribution Quantile Function. This will now return the value 1. The number inputted to the Exponential Distribution Quantile Function was: " + str(p))
             return 1
         else:
-            return ((self.max - self.min) * p + self.min)
+            return _to_float64(self._quantile_array(_valid_probabilities(p)))
+
+    def _quantile_array(self,p):
+        '''
+        The quantile for a numpy array of values in [0,1)
+        '''
+        return (self.max - self.min) * p + self.min
+
+
+
+
 
+class _lattice_distribution(Distribution):
+    # The discrete distributions whose values are the min plus a whole number of steps, which is what their alias tables and chi squared counts go by
+    __slots__ = ('step',)
+    IsDiscrete = True
+    Piecewise = True
+    HasQuantile = True
 
+    def _support_values(self, i):
+        return self.min + i * self.step
 
+    def _support_index(self, x):
+        return np.round((np.asarray(x, dtype=np.float64) - self.min) / self.step).astype(np.int64)
 
+    def _default_dtype(self):
+        '''
+        Samples are only whole numbers when the min and the step both are
+        '''
+        if np.issubdtype(np.asarray(self.min).dtype, np.integer) and np.issubdtype(np.asarray(self.step).dtype, np.integer):
+            return np.int64
+        return np.float64 #Steps such as 0.5 give samples which aren't whole numbers
+
+
+class discrete_uniform_distribution(_lattice_distribution):
+    __slots__ = ('NumOfSteps',)
 
-class discrete_uniform_distribution(Distribution):
     def __init__(self,min,max,step = 1):
         '''
         This gives the distribution all the common information. You can call any of these, apart from x of course.
         Calling these attributes gives the value or a formula, depending on which you call
         '''
-        if not max > min:
+        min = _parameter(min)
+        max = _parameter(max)
+        step = _parameter(step)
+        if not np.all(max > min):
             print("The max must be greater than the min!")
         
-        self.IsDiscrete = True
-        self.Piecewise = True
-        self.HasQuantile = True
-        self.NumOfSteps = int((max - min) / step) + 1
-        self.mean = (max + min) / 2
-        self.var = ((self.NumOfSteps) ** 2 - 1) / 12
-        self.sd = sym.sqrt(self.var)
+        steps = (max - min) / step
+        self.NumOfSteps = int(steps) + 1 if np.ndim(steps) == 0 else steps.astype(np.int64) + 1
         self.min = min
         self.step = step
         self.max = min + (self.NumOfSteps - 1) * step
+        self.mean = (self.max + self.min) / 2 #Uses the max after it has been moved onto a step
+        self.var = step ** 2 * ((self.NumOfSteps) ** 2 - 1) / 12
+        self.sd = np.sqrt(self.var)
+
+    def _build_pdf(self):
+        return 1 / self.NumOfSteps
+
+    def _build_cdf(self):
         x = sym.Symbol("x")
         k = sym.Symbol("k")
-        self.pdf = 1 / self.NumOfSteps
-        self.cdf = sym.summation((1 / self.NumOfSteps),(k,0,sym.floor(x)))
+        return sym.summation((1 / self.NumOfSteps),(k,0,sym.floor(x)))
 
     def find_PDF(self,x, safe = False):
         """
-        This finds the distributions probability density function at a given value of x
+        This finds the distributions probability density function at a given value of x, which can be a number or a numpy array
         """
-        #These if conditions check if the value is a gap or a value
-        if sym.floor(round(((x - self.min) / self.step),5)) == round(((x - self.min) / self.step),5) and not x < self.min and not x > self.max and safe:
-            return 1 / self.NumOfSteps
-        elif sym.floor(round(((x - self.min) / self.step),9)) == round(((x - self.min) / self.step),9) and not x < self.min and not x > self.max:
-            return 1 / self.NumOfSteps
-        else:
-            return 0
+        x = np.asarray(x, dtype=np.float64)
+        steps = (x - self.min) / self.step
+        #These conditions check if the value is a gap or a value
+        on_step = np.floor(np.round(steps, 9)) == np.round(steps, 9)
+        if safe:
+            on_step = on_step | (np.floor(np.round(steps, 5)) == np.round(steps, 5))
+        in_range = (x >= self.min) & (x <= self.max)
+        return _to_float64(np.where(on_step & in_range, 1 / self.NumOfSteps, 0))
     def find_CDF(self,x,safe = False):
         """
-        This finds the distributions cumulative density function at a given value of x
+        This finds the distributions cumulative density function at a given value of x, which can be a number or a numpy array.
+        Every step has the same probability, so the CDF is the number of steps done so far divided by the number of steps
         """
-        if x < self.min:
-            return 0
-        elif x > self.max or x == self.max:
-            return 1
-        elif safe:
-            cdf = 0  #Doing this method because summation function is buggy
-            for i in range(sym.floor(round((1 + (x - self.min) / self.step),5))): #This long expression is how many steps have been done already
-                cdf += self.find_PDF(self.min + self.step * i, safe = True)
-            return cdf
-        else:
-            cdf = 0  #Doing this method because summation function is buggy
-            for i in range(sym.floor(round((1 + (x - self.min) / self.step),9))): #This long expression is how many steps have been done already
-                cdf += self.find_PDF(self.min + self.step * i)
-            return cdf
+        x = np.asarray(x, dtype=np.float64)
+        decimals = 5 if safe else 9
+        steps_done = np.floor(np.round(1 + (x - self.min) / self.step, decimals)) #This long expression is how many steps have been done already
+        cdf = np.where(x < self.min, 0, np.where(x >= self.max, 1, steps_done / self.NumOfSteps))
+        return _to_float64(cdf)
 
             
     def find_quantile(self,p):
         """
-        This finds the distributions quantile at a given value x
+        This finds the distributions quantile at a given value x.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
         """
-        Found = False
-        n = 0
-        if p < 0 or p > 1:
+        if np.ndim(p) == 0 and not 0 <= p <= 1:
             print("Invalid number inputted into the Discrete Uniform Distribution Quantile Function. This will now return the value 1. The number inputted to the Poisson Distribution Quantile Function was: " + str(p))
             return 1
+        if np.ndim(p) == 0 and not self.shape:
+            return self.min + int(np.floor(p * self.NumOfSteps)) * self.step
+        return self._quantile_array(_valid_probabilities(p))
+
+    def _quantile_array(self,p):
         '''
-        This is for discrete and piecewise distributions only. It checks if the given is less than the cdf for n starting 
-        from 0 until the end is found. If the given value is 1, this will go on forever.
+        The quantile for a numpy array of values in [0,1).
+        The smallest n with p < n / NumOfSteps is floor(p * NumOfSteps) + 1, and the quantile is n - 1 steps above the min.
         '''
-        while Found == False:
-            if p < n / (self.NumOfSteps):
-                Found = True
-            else:
-                n = n + 1 #This is how many steps it is greater than, -1
+        return self.min + np.floor(p * self.NumOfSteps) * self.step
+
+    def _support_pmf(self):
+        return np.full(self.NumOfSteps, 1 / self.NumOfSteps)
 
-        return self.min + (n - 1) * self.step #this fixes the -1 problem
 
 class binomial_distribution(Distribution):
+    __slots__ = ('probability',)
+    IsDiscrete = True
+    Piecewise = False
+    HasQuantile = True
+
     def __init__(self,n,p):
-        self.IsDiscrete = True
-        self.Piecewise = False
-        self.HasQuantile = True
+        n = _parameter(n)
+        p = _parameter(p)
         self.mean = n * p
         self.var = n * p * (1-p)
-        self.sd = sym.sqrt(self.var)
+        self.sd = np.sqrt(self.var)
         self.max = n
         self.min = 0
         self.probability = p
+
+    def _build_pdf(self):
         x = sym.Symbol("x")
-        k = sym.Symbol("k")
-        self.pdf = _choose(n,x) * (p ** x) * ((1 - p) ** (n - x))
+        return _choose(self.max,x) * (self.probability ** x) * ((1 - self.probability) ** (self.max - x))
 
-    def find_PDF(self,x,safe = False):
-        if x < self.min or x > self.max:
-            return 0
-        if -1 < x and x < self.max + 1 and sym.floor(x) == x:
-            result = _choose(self.max,x) * (self.probability ** x) * ((1 - self.probability) ** (self.max - x))
-        else:
-            result = 0
-        return result
+    def find_PDF(self,x,safe = False,symbolic = False):
+        """
+        This finds the distributions probability density function at a given value of x.
+        x can be a number or a numpy array, and the result is a float64 (or an array of them).
+        Setting symbolic to True gives the exact sympy value instead.
+        """
+        if symbolic:
+            if x < self.min or x > self.max:
+                return 0
+            if -1 < x and x < self.max + 1 and sym.floor(x) == x:
+                result = _choose(self.max,x) * (self.probability ** x) * ((1 - self.probability) ** (self.max - x))
+            else:
+                result = 0
+            return result
+        return _to_float64(np.exp(self.find_log_PDF(x)))
 
-    def find_CDF(self,x,safe = False):
-        total = 0
-        for n in range(sym.ceiling(x + 1)):
-            total += self.find_PDF(n)
-        return total
+    def find_log_PDF(self,x):
+        """
+        The log of the PDF, using gammaln for the log of n choose x so there are no huge factorials. It is -inf away from the whole numbers 0 to n
+        """
+        x = np.asarray(x, dtype=np.float64)
+        whole = (x >= self.min) & (x <= self.max) & (np.floor(x) == x)
+        return _to_float64(np.where(whole, self._log_pmf(np.where(whole, x, 0)), -np.inf))
+
+    def find_CDF(self,x,safe = False,symbolic = False):
+        """
+        This finds the distributions cumulative density function at a given value of x.
+        x can be a number or a numpy array. scipy's bdtr works it out from the regularised incomplete beta function, so it takes the same time for any n.
+        Setting symbolic to True adds up the exact sympy PDF instead.
+        """
+        if symbolic:
+            total = 0
+            for n in range(sym.ceiling(x + 1)):
+                total += self.find_PDF(n, symbolic = True)
+            return total
+        x = np.asarray(x, dtype=np.float64)
+        k = np.clip(np.floor(x), 0, self.max)
+        return _to_float64(np.where(x < 0, 0, np.where(x >= self.max, 1, bdtr(k, self.max, self.probability))))
 
-    def find_quantile(self,x):
+    def find_quantile(self,p,symbolic = False):
+        """
+        This finds the distributions quantile at a given value x.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
+        Setting symbolic to True uses the exact sympy CDF instead.
+        """
+        if np.ndim(p) == 0 and not 0 <= p < 1: #Also catches nan, which the table would otherwise turn into its last value
+            print("Invalid number inputted into the Binomial Distribution Quantile Function. This will now return the value 1. The number inputted to the Binomial Distribution Quantile Function was: " + str(p))
+            return 1
+        if not symbolic:
+            p = np.asarray(p, dtype=np.float64)
+            if p.ndim == 0 and not self.shape:
+                return int(self._quantile_array(p))
+            valid = (p >= 0) & (p < 1)
+            return np.where(valid, self._quantile_array(np.where(valid, p, 0)), np.nan)
         found = False
         n = 0
         while found == False:
-            if x < self.find_CDF(n):
+            if p < self.find_CDF(n, symbolic = True):
                 found = True
             else:
                 n += 1
         return n
 
+    def _quantile_array(self,p):
+        '''
+        The quantile for a numpy array of values in [0,1), from a binary search of the cached CDF table when _uses_table says it is worth making.
+        Otherwise, and with arrays of parameters, a guess from _quantile_guess is corrected by a guided search, which takes the same time for any n
+        '''
+        if self.shape or not self._uses_table(p):
+            return _discrete_quantile_search(p, self._quantile_guess(p), lambda k: bdtr(k, self.max, self.probability), self.max)
+        return self._table_quantile(p)
+
+    def _quantile_guess(self,p):
+        '''
+        The Cornish-Fisher guess, using the binomial skew of (1 - 2p)/sd and excess kurtosis of (1 - 6p(1 - p))/var
+        '''
+        q = self.probability
+        sd = np.asarray(self.sd, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'): #p = 0 or 1 has no skew, and its guess of nan is replaced by 0
+            return _cornish_fisher_guess(p, self.mean, sd, (1 - 2 * q) / sd, (1 - 6 * q * (1 - q)) / sd ** 2)
+
+    def _log_pmf(self,k):
+        '''
+        The log of the probability of each whole number k from 0 to n. xlogy and xlog1py keep p = 0 and p = 1 working
+        '''
+        n = self.max
+        p = self.probability
+        return _log_choose(n, k) + xlogy(k, p) + xlog1py(n - k, -p)
+
+    def _table_range(self):
+        '''
+        10 standard deviations either side of the mean plus 10, kept between 0 and n. Like the Poisson one, the tails left out are below 1e-20
+        '''
+        start = max(0, int(np.floor(self.mean - 10 * self.sd - 10)))
+        stop = min(self.max, int(np.ceil(self.mean + 10 * self.sd + 10)))
+        return start, stop
+
 class chi_squared_distribution(Distribution):
+    __slots__ = ('dof',)
+    IsDiscrete = False
+    Piecewise = False
+    HasQuantile = True
+
     def __init__(self,k):
-        if not sym.floor(k) == k or k<1:
+        k = _parameter(k)
+        if np.any(np.floor(k) != k) or np.any(k < 1):
             print("Error: You did not enter a natural number for the degrees of freedom")
         else:
-            self.IsDiscrete = False
-            self.Piecewise = False
-            self.HasQuantile = False
             self.mean = k
             self.var = 2 * k
-            self.sd = sym.sqrt(self.var)
+            self.sd = np.sqrt(self.var)
             self.max = np.inf
             self.min = 0
             self.dof = k
-            x = sym.Symbol("x")
-            t = sym.Symbol("t")
-            self.pdf = x**(k/2 - 1) * sym.exp(-x/2)/(gamma(k/2)* 2 ** (k/2))
-            self.cdf = sym.integrate((t) ** (k/2 - 1) * sym.exp(-t),(t,0,x/2)) / gamma(k/2)
+
+    def _build_pdf(self):
+        x = sym.Symbol("x")
+        k = self.dof
+        return x**(k/2 - 1) * sym.exp(-x/2)/(gamma(k/2)* 2 ** (k/2))
+
+    def _build_cdf(self):
+        x = sym.Symbol("x")
+        t = sym.Symbol("t")
+        k = self.dof
+        return sym.integrate((t) ** (k/2 - 1) * sym.exp(-t),(t,0,x/2)) / gamma(k/2)
+
+    def find_PDF(self,x):
+        """
+        This finds the distributions probability density function at a given value of x, which can be a number or a numpy array.
+        It is worked out in logs so large degrees of freedom don't overflow
+        """
+        return _to_float64(np.exp(self.find_log_PDF(x)))
+
+    def find_log_PDF(self,x):
+        """
+        The log of the PDF, which is -inf below 0
+        """
+        x = np.asarray(x, dtype=np.float64)
+        half = self.dof / 2
+        log_pdf = xlogy(half - 1, np.maximum(x, 0)) - x / 2 - gammaln(half) - half * np.log(2)
+        return _to_float64(np.where(x < 0, -np.inf, log_pdf))
+
+    def find_CDF(self,x):
+        """
+        This finds the distributions cumulative density function at a given value of x, which can be a number or a numpy array.
+        scipy's gammainc is already the regularised incomplete gamma function, so it is the CDF as it is
+        """
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(gammainc(self.dof / 2, np.maximum(x, 0) / 2))
+
+    def find_quantile(self,p):
+        """
+        This finds the distributions quantile at a given value x, using the inverse of the regularised incomplete gamma function.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
+        """
+        if np.ndim(p) == 0 and (p < 0 or p > 1):
+            print("Invalid number inputted into the Chi Squared Distribution Quantile Function. This will now return the value 1. The number inputted to the Chi Squared Distribution Quantile Function was: " + str(p))
+            return 1
+        return _to_float64(self._quantile_array(_valid_probabilities(p)))
+
+    def _quantile_array(self,p):
+        return 2 * gammaincinv(self.dof / 2, p)
+
+    def _find_samples(self, num, rng):
+        '''
+        A chi squared distribution with k degrees of freedom is a gamma distribution with shape k/2 and scale 2,
+        and numpy's gamma generator takes the same time per sample whatever k is
+        '''
+        return 2 * rng.standard_gamma(self.dof / 2, (num,) + self.shape)
+
+
+class custom_distribution(Distribution):
+    __slots__ = ('density', 'expression', 'tol', 'normaliser', '_grid', '_grid_cdf')
+    IsDiscrete = False
+    Piecewise = False
+    HasQuantile = True
+
+    def __init__(self,pdf,min = -np.inf,max = np.inf,tol = 1e-8):
+        '''
+        A continuous distribution made from any PDF, given either as a sympy expression in x (like the .pdf of the other distributions) or as a function of x.
+        The PDF doesn't have to add up to 1, as it is scaled so it does.
+        When it is made the PDF is integrated once into a table of the CDF on an even grid, which is made twice as fine until the CDF changes by less than tol.
+        An infinite min or max is cut off where less than tol of the probability lies beyond it (give finite bounds for PDFs far away from 0).
+        find_CDF, find_quantile and sampling are then interpolation in that table, so they are vectorised and take the same time whatever the PDF is.
+        '''
+        if hasattr(pdf, 'free_symbols'): #A sympy expression
+            symbols = pdf.free_symbols
+            x = symbols.pop() if len(symbols) == 1 else sym.Symbol("x")
+            self.expression = pdf.subs(x, sym.Symbol("x"))
+            density = sym.lambdify(x, pdf, 'numpy')
+        else:
+            self.expression = None
+            density = pdf
+        with np.errstate(all='ignore'):
+            try:
+                vectorised = np.shape(density(np.array([0.25, 0.75]))) == (2,)
+            except Exception:
+                vectorised = False
+        if not vectorised: #Functions which only take one number at a time, and sympy expressions which are constants
+            density = np.vectorize(density, otypes=[np.float64])
+        self.density = density
+        self.tol = tol
+        if not max > min:
+            print("The max must be greater than the min!")
+        self.min = min
+        self.max = max
+
+        bounds = _truncated_bounds(self._density_array, min, max, tol)
+        if bounds is None:
+            print("Invalid Parameters. The PDF must be above 0 somewhere between the min and the max, and add up to a finite number. If it is narrow and far from 0, give a finite min and max around it.")
+            return
+        lower, upper = bounds
+        grid, values, cdf = _cdf_grid(self._density_array, lower, upper, tol)
+        if not (np.isfinite(cdf[-1]) and cdf[-1] > 0): #The table missed where the PDF is, such as a peak narrower than its spacing
+            print("Invalid Parameters. The PDF added up to " + str(cdf[-1]) + " on the CDF table between " + str(lower) + " and " + str(upper) + ". Try giving a finite min and max around where it is above 0.")
+            return
+        self.normaliser = cdf[-1]
+        self._grid = grid
+        self._grid_cdf = cdf / cdf[-1]
+        step = grid[1] - grid[0]
+        values = values / self.normaliser
+        self.mean = _trapezoid(grid * values, step)
+        self.var = _trapezoid((grid - self.mean) ** 2 * values, step)
+        self.sd = np.sqrt(self.var)
+
+    def _density_array(self,x):
+        '''
+        The PDF as it was given (not scaled) for a numpy array, where anything that isn't a finite number above 0 is taken as 0
+        '''
+        x = np.asarray(x, dtype=np.float64)
+        with np.errstate(all='ignore'):
+            values = np.asarray(self.density(np.ravel(x)), dtype=np.float64).reshape(x.shape)
+        return np.where(np.isfinite(values) & (values > 0), values, 0)
+
+    def _build_pdf(self):
+        if self.expression is None:
+            raise AttributeError("custom_distribution has no symbolic pdf when it is made from a function")
+        return self.expression / self.normaliser
 
     def find_PDF(self,x):
-        z = x ** (self.dof/2 - 1) * np.e ** (-x/2)/(gamma(self.dof/2) * 2 ** (self.dof/2))
-        return z
+        """
+        This finds the distributions probability density function at a given value of x, which can be a number or a numpy array.
+        It is the given PDF divided by its total, so it adds up to 1
+        """
+        x = np.asarray(x, dtype=np.float64)
+        inside = (x >= self.min) & (x <= self.max)
+        return _to_float64(np.where(inside, self._density_array(x) / self.normaliser, 0))
 
     def find_CDF(self,x):
-        z = gammainc(self.dof/2, x/2) / gamma(self.dof/2)
-        return z
-
-    def _find_sample(self):
-        standard_normal = normal_distribution(0,1)
-        result = 0
-        for n in range(self.dof):
-            z = standard_normal.take_sample()
-            z = z ** 2
-            result += z
-        return result
+        """
+        This finds the distributions cumulative density function at a given value of x, which can be a number or a numpy array,
+        by interpolating in the CDF table
+        """
+        x = np.asarray(x, dtype=np.float64)
+        return _to_float64(np.interp(x, self._grid, self._grid_cdf, left=0, right=1))
+
+    def find_quantile(self,p):
+        """
+        This finds the distributions quantile at a given value x, by interpolating in the CDF table the other way round.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
+        """
+        if np.ndim(p) == 0 and (p < 0 or p > 1):
+            print("Invalid number inputted into the Custom Distribution Quantile Function. This will now return the value 1. The number inputted to the Custom Distribution Quantile Function was: " + str(p))
+            return 1
+        return _to_float64(self._quantile_array(_valid_probabilities(p)))
+
+    def _quantile_array(self,p):
+        '''
+        The quantile for a numpy array of values in [0,1). The table's CDF is a straight line between grid points, and this is its exact inverse
+        '''
+        return np.interp(p, self._grid_cdf, self._grid)
+
+
+class discrete_table_distribution(_lattice_distribution):
+    __slots__ = ('probabilities',)
+    shape = () #The table is one distribution, not a grid of parameters
+
+    def __init__(self,pmf,start = 0,step = 1):
+        '''
+        A discrete distribution given by a table of probabilities, where pmf[i] is the probability of start + i * step.
+        The probabilities are scaled to add up to 1. find_sum_distribution gives its results as these.
+        The CDF table and the alias table are the same ones the other discrete distributions use, so find_CDF and find_quantile are lookups and binary searches,
+        and take_multiple_samples(method = 'alias') takes the same time per sample however long the table is.
+        '''
+        pmf = np.asarray(pmf, dtype=np.float64)
+        if pmf.ndim != 1 or len(pmf) == 0 or np.any(pmf < 0) or not pmf.sum() > 0:
+            print("Invalid Parameters. The table must be a list of probabilities which aren't negative and don't all equal 0.")
+        self.probabilities = pmf / pmf.sum()
+        self.step = step
+        self.min = start
+        self.max = start + (len(pmf) - 1) * step
+        values = start + np.arange(len(pmf)) * step
+        self.mean = float(values @ self.probabilities)
+        self.var = float(((values - self.mean) ** 2) @ self.probabilities)
+        self.sd = np.sqrt(self.var)
+
+    def _steps(self,x,safe):
+        '''
+        How many steps x is above the min, rounded to 9 dp (5 dp if safe) to avoid floating point errors
+        '''
+        return np.round((np.asarray(x, dtype=np.float64) - self.min) / self.step, 5 if safe else 9)
+
+    def find_PDF(self,x,safe = False):
+        """
+        This finds the distributions probability density function at a given value of x, which can be a number or a numpy array.
+        It is 0 away from the values in the table
+        """
+        steps = self._steps(x, safe)
+        in_table = (steps >= 0) & (steps <= len(self.probabilities) - 1) & (np.floor(steps) == steps)
+        return _to_float64(np.where(in_table, self.probabilities[np.where(in_table, steps, 0).astype(np.int64)], 0))
+
+    def find_CDF(self,x,safe = False):
+        """
+        This finds the distributions cumulative density function at a given value of x, which can be a number or a numpy array, by looking it up in the CDF table
+        """
+        return _to_float64(self._table_CDF(np.floor(self._steps(x, safe))))
+
+    def find_quantile(self,p):
+        """
+        This finds the distributions quantile at a given value x, from a binary search of the CDF table.
+        p can be a number or a numpy array, where invalid numbers in an array give nan.
+        """
+        if np.ndim(p) == 0 and not 0 <= p <= 1: #Also catches nan
+            print("Invalid number inputted into the Discrete Table Distribution Quantile Function. This will now return the value 1. The number inputted to the Discrete Table Distribution Quantile Function was: " + str(p))
+            return 1
+        if np.ndim(p) == 0:
+            return np.asarray(self._quantile_array(p), dtype=self._default_dtype()).item()
+        p = _valid_probabilities(p)
+        valid = ~np.isnan(p)
+        return np.where(valid, self._quantile_array(np.where(valid, p, 0)), np.nan)
+
+    def _quantile_array(self,p):
+        '''
+        The quantile for a numpy array of values in [0,1]
+        '''
+        return self._support_values(self._table_quantile(p))
+
+    def _cdf_table(self):
+        '''
+        The table is already the probabilities, counted in steps from the min
+        '''
+        if self._table is None:
+            cdf = np.cumsum(self.probabilities)
+            cdf[-1] = 1.0
+            self._table = (0, self.probabilities, cdf)
+        return self._table
 
-    #There is no find quantile function as it is too difficult
 
 
 class joint_distribution():
+    __slots__ = ('x_dist', 'y_dist', 'normaliser', '_pdf')
+
     def __init__(self,d1,d2):
-        x = sym.Symbol("x")
-        y = sym.Symbol("y")
+        '''
+        The joint distribution of two independent distributions, d1 for x and d2 for y.
+        The PDF is the product of their PDFs, divided by a normalising constant which is only worked out (numerically) if one of them isn't a beanPy distribution
+        '''
         self.x_dist = d1
         self.y_dist = d2
-        pdf1 = self.x_dist.pdf
-        pdf2 = self.y_dist.pdf
-        pdf2 = pdf2.subs(x, y)
-        self.pdf = pdf1 * pdf2
-        k = sym.integrate(sym.integrate(self.pdf,(x,self.x_dist.min,self.x_dist.max)),(y,self.y_dist.min,self.y_dist.max))
-        self.pdf = (self.pdf / k).simplify()
-
-    def find_PDF(self,xval,yval):
-        x = sym.Symbol("x")
-        y = sym.Symbol("y")
-        z = self.pdf.subs(x, xval)
-        z = z.subs(y, yval)
-        if xval < self.x_dist.min or xval > self.x_dist.max or yval < self.y_dist.min or yval > self.y_dist.max:
-            return 0
-        return z
+        self._pdf = None
+        self.normaliser = _total_probability(d1) * _total_probability(d2)
+
+    @property
+    def pdf(self):
+        '''
+        The sympy formula for the joint PDF in terms of x and y. It is only worked out the first time it is used
+        '''
+        if self._pdf is None:
+            if _PROFILE is not None:
+                _PROFILE.flag_symbolic(self, 'pdf')
+            x = sym.Symbol("x")
+            y = sym.Symbol("y")
+            pdf1 = self.x_dist.pdf
+            pdf2 = self.y_dist.pdf
+            if pdf1 is None or pdf2 is None: #One of them has a parameter grid
+                return None
+            pdf2 = pdf2.subs(x, y)
+            pdf = pdf1 * pdf2
+            if self.normaliser != 1:
+                pdf = pdf / self.normaliser
+            self._pdf = pdf.simplify()
+        return self._pdf
+
+    def find_PDF(self,xval,yval,symbolic = False):
+        '''
+        Finds the joint PDF at (xval, yval). These can be numbers or numpy arrays, which are broadcast against each other.
+        Setting symbolic to True substitutes into the sympy formula instead.
+        '''
+        if symbolic:
+            if _PROFILE is not None:
+                _PROFILE.flag_symbolic(self, 'find_PDF(symbolic=True)')
+            x = sym.Symbol("x")
+            y = sym.Symbol("y")
+            z = self.pdf.subs(x, xval)
+            z = z.subs(y, yval)
+            if xval < self.x_dist.min or xval > self.x_dist.max or yval < self.y_dist.min or yval > self.y_dist.max:
+                return 0
+            return z
+        xval = np.asarray(xval, dtype=np.float64)
+        yval = np.asarray(yval, dtype=np.float64)
+        z = self.x_dist.find_PDF(xval) * self.y_dist.find_PDF(yval) / self.normaliser
+        outside = (xval < self.x_dist.min) | (xval > self.x_dist.max) | (yval < self.y_dist.min) | (yval > self.y_dist.max)
+        return _to_float64(np.where(outside, 0, z))
+
+    def find_PDF_grid(self,x_stuff,y_stuff):
+        '''
+        Gives the x values, the y values and the matrix of the joint PDF that draw_PDF shows, without drawing it.
+        x_stuff and y_stuff are the same as in draw_PDF. Row i of the matrix is the i-th y value.
+        Since x and y are independent, the matrix is the outer product of the two PDFs, so each PDF is only worked out once per grid line.
+        '''
+        x_plt = np.linspace(x_stuff[0],x_stuff[1],x_stuff[2])
+        y_plt = np.linspace(y_stuff[0],y_stuff[1],y_stuff[2])
+        x_pdf = np.where((x_plt < self.x_dist.min) | (x_plt > self.x_dist.max), 0, self.x_dist.find_PDF(x_plt))
+        y_pdf = np.where((y_plt < self.y_dist.min) | (y_plt > self.y_dist.max), 0, self.y_dist.find_PDF(y_plt))
+        M = np.outer(y_pdf, x_pdf) / self.normaliser
+        return x_plt, y_plt, M
 
     def draw_PDF(self,x_stuff,y_stuff):
         '''
@@ -565,13 +1955,7 @@ class joint_distribution():
         The lower bound of x to be graphed, the upper bound of x to be graphed, and the number of points in the x-axis to be graphed. (The order is important)
         Similar for y_stuff
         '''
-        
-        x_step = (x_stuff[1] - x_stuff[0]) / x_stuff[2]
-        y_step = (y_stuff[1] - y_stuff[0]) / y_stuff[2]
-        z_array = [[0 for n in range(x_stuff[2])] for i in range(y_stuff[2])]
-        y_plt = np.linspace(y_stuff[0],y_stuff[1],y_stuff[2])
-        x_plt = np.linspace(x_stuff[0],x_stuff[1],x_stuff[2])
-        M = np.array([[float(self.find_PDF(x,y)) for x in x_plt] for y in y_plt])
+        x_plt, y_plt, M = self.find_PDF_grid(x_stuff, y_stuff)
         plt.imshow(M)
         plt.colorbar()
         plt.show()
@@ -579,20 +1963,446 @@ class joint_distribution():
     def take_sample(self):
         return self.x_dist.take_sample(), self.y_dist.take_sample()
 
+    def __reduce__(self):
+        '''
+        Pickles only the two distributions (which pickle as their parameters), so the sympy formula is never sent
+        '''
+        return (joint_distribution, (self.x_dist, self.y_dist))
+
+    def to_dict(self):
+        '''
+        Gives the joint distribution as a dictionary, with the two distributions as dictionaries inside it
+        '''
+        return {'type': 'joint_distribution', 'parameters': {'d1': self.x_dist.to_dict(), 'd2': self.y_dist.to_dict()}}
+
+    from_dict = staticmethod(Distribution.from_dict)
 
+    def take_samples(self, n, seed=None, uniforms='random', scramble=True):
+        '''
+        Takes n samples as an (n, 2) numpy array, with the x values in the first column and the y values in the second.
+        With a seed, x and y each get their own random number stream spawned from it.
+        'uniforms' and 'scramble' are the same as in take_multiple_samples. Anything but 'random' draws x and y together
+        from one two dimensional sequence (so a Sobol or Latin hypercube sample covers the plane evenly) and puts them through each quantile.
+        '''
+        if uniforms != 'random' and uniforms in _UNIFORMS:
+            rng = rng_unseeded if seed is None else np.random.default_rng(seed)
+            u = _uniform_draws(uniforms, n, (2,), rng, scramble)
+            return np.column_stack((self.x_dist._quantile_array(u[:, 0]), self.y_dist._quantile_array(u[:, 1]))).astype(np.float64)
+        if seed is None:
+            x_seed, y_seed = None, None
+        else:
+            x_seed, y_seed = np.random.SeedSequence(seed).spawn(2)
+        result = np.empty((n, 2))
+        self.x_dist.take_multiple_samples(n, x_seed, out = result[:, 0], uniforms = uniforms)
+        self.y_dist.take_multiple_samples(n, y_seed, out = result[:, 1], uniforms = uniforms)
+        return result
 
 
-    
+class sample_store():
+    __slots__ = ('directory', 'max_bytes', 'chunk_size', 'hits', 'misses')
 
+    def __init__(self,directory,max_bytes = None,chunk_size = 2 ** 20):
+        '''
+        Keeps seeded samples in .npy files in a directory, so asking for the same samples again opens the file instead of making them again.
+        Each file is named after a sha256 of the distribution's to_dict, the seed, the method, the dtype, the number of samples and SAMPLER_VERSION.
+        When the files come to more than max_bytes (if it is given), the least recently used ones are deleted until they fit.
+        Samples are written chunk_size at a time with write_samples, so they never all need to be in memory.
+        '''
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
 
-            
+    def take_multiple_samples(self, distribution, num, seed=None, method='quantile', dtype=None):
+        '''
+        Gives the same samples as distribution.take_multiple_samples(num, seed, method = method, dtype = dtype), as a read only memory map of the stored file.
+        The first time they are made and written to a temporary file, which is then renamed into place so a half written file is never used.
+        Samples without a seed are different every time, so they are made as normal and not stored. Neither are distributions which can't be put into JSON by to_dict.
+        '''
+        if dtype is None:
+            dtype = distribution._default_dtype()
+        key = _sample_key(distribution, num, seed, method, dtype)
+        if key is None:
+            return distribution.take_multiple_samples(num, seed, dtype = dtype, method = method)
+        path = os.path.join(self.directory, key + '.npy')
+        try:
+            os.utime(path) #Marks it as just used, for the least recently used order
+            self.hits += 1
+            return np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            self.misses += 1
+        handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        os.close(handle)
+        try:
+            if distribution.shape and np.shape(seed) == distribution.shape: #A seed for every parameter set, which take_sample_chunks doesn't do
+                with open(temporary, 'wb') as file:
+                    np.save(file, distribution.take_multiple_samples(num, seed, dtype = dtype, method = method), allow_pickle=False)
+            else:
+                distribution.write_samples(temporary, num, self.chunk_size, seed, method, dtype)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._evict(path)
+        return np.load(path, mmap_mode='r')
+
+    def _evict(self, keep):
+        '''
+        Deletes the least recently used files (apart from 'keep', the one just written) until they fit in max_bytes
+        '''
+        if self.max_bytes is None:
+            return
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in sorted(files, key=lambda file: file[2]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError: #Another process got there first, or (on Windows) it is still open
+                pass
 
+    def _files(self):
+        '''
+        The path, size and last use of every stored file
+        '''
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def clear(self):
+        '''
+        Deletes every stored file and resets the hit and miss counts
+        '''
+        for path, _, _ in self._files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.hits = 0
+        self.misses = 0
 
+    def info(self):
+        '''
+        Gives the hits, misses, number of files, their total bytes and max_bytes as a dictionary
+        '''
+        files = self._files()
+        return {'hits': self.hits, 'misses': self.misses, 'files': len(files), 'bytes': sum(size for _, size, _ in files), 'max_bytes': self.max_bytes}
 
 
 rng_unseeded = np.random.default_rng()
 rng_seeded = np.random.default_rng()
 
+_DISTRIBUTION_TYPES['joint_distribution'] = joint_distribution
+for _name in ('find_PDF', 'find_PDF_grid', 'take_samples'):
+    setattr(joint_distribution, _name, _profiled(joint_distribution.__dict__[_name]))
+del _name
+
+def _sample_chunks(samples):
+    '''
+    Goes through samples given either as one array (or list) or as an iterable of chunks, giving numpy arrays
+    '''
+    if isinstance(samples, (np.ndarray, list, tuple)):
+        yield np.asarray(samples)
+    else:
+        for chunk in samples:
+            yield np.asarray(chunk)
+
+def _sample_key(distribution, num, seed, method, dtype):
+    '''
+    The sha256 sample_store names a file of samples by, or None if they can't be stored
+    '''
+    if seed is None:
+        return None
+    if isinstance(seed, np.random.SeedSequence):
+        seed = {'entropy': seed.entropy, 'spawn_key': list(seed.spawn_key)}
+    else:
+        seed = np.asarray(seed, dtype=object).tolist()
+    description = {'distribution': distribution.to_dict(), 'seed': seed, 'method': method, 'dtype': np.dtype(dtype).str, 'num': num, 'version': SAMPLER_VERSION}
+    try:
+        text = json.dumps(description, sort_keys=True, default=_json_number)
+    except (TypeError, ValueError): #Such as a custom_distribution made from a function
+        return None
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def _json_number(value):
+    '''
+    Lets json.dumps write numpy numbers, which seeds and parameters can be
+    '''
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(type(value).__name__ + " can't be put into JSON")
+
+def _rebuild_distribution(cls, args, kwargs):
+    '''
+    Unpickles a distribution which was made with keyword arguments
+    '''
+    return cls(*args, **kwargs)
+
+def _to_dict(distribution, init):
+    '''
+    Names the arguments a distribution was made with, using the parameter names of its __init__.
+    numpy numbers and arrays are turned into plain Python ones so the dictionary can be saved as JSON
+    '''
+    arguments = inspect.signature(init).bind(None, *distribution._args, **distribution._kwargs).arguments
+    arguments.pop('self')
+    parameters = {name: np.asarray(value).tolist() if isinstance(value, (np.ndarray, np.generic)) else value for name, value in arguments.items()}
+    return {'type': type(distribution).__name__, 'parameters': parameters}
+
+def _from_dict(dictionary):
+    '''
+    Makes the distribution a dictionary from to_dict describes. Parameters which are dictionaries themselves (the parts of a joint distribution) are made first
+    '''
+    cls = _DISTRIBUTION_TYPES[dictionary['type']]
+    parameters = {}
+    for name, value in dictionary['parameters'].items():
+        if isinstance(value, dict) and 'type' in value:
+            value = _from_dict(value)
+        parameters[name] = value
+    return cls(**parameters)
+
+def _total_probability(distribution):
+    '''
+    The total probability of a distribution used in a joint distribution. beanPy's distributions already add up to 1,
+    so the integral is only done for other objects with a find_PDF, min and max
+    '''
+    if isinstance(distribution, Distribution):
+        return 1
+    from scipy.integrate import quad
+    return quad(lambda x: float(distribution.find_PDF(x)), distribution.min, distribution.max)[0]
+
+def _truncated_bounds(density, lower, upper, tol):
+    '''
+    Moves an infinite bound of custom_distribution in (doubling the distance each time from where the PDF is largest) until less than tol / 2
+    of the probability lies beyond it. Gives None if the PDF doesn't add up to a finite number above 0
+    '''
+    from scipy.integrate import quad
+    def f(x):
+        return float(density(np.array([x]))[0])
+    centre = _density_centre(density, lower, upper)
+    if centre is None:
+        return None
+    #Integrating either side of the peak stops quad missing it when it is far from 0
+    total = quad(f, lower, centre, limit=200)[0] + quad(f, centre, upper, limit=200)[0]
+    if not (np.isfinite(total) and total > 0):
+        return None
+    if np.isinf(upper):
+        width = 1.0
+        while quad(f, centre + width, np.inf, limit=200)[0] > tol * total / 2:
+            width *= 2
+        upper = centre + width
+    if np.isinf(lower):
+        width = 1.0
+        while quad(f, -np.inf, centre - width, limit=200)[0] > tol * total / 2:
+            width *= 2
+        lower = centre - width
+    return lower, upper
+
+def _density_centre(density, lower, upper):
+    '''
+    Roughly where the PDF is largest, out of points spread evenly between finite bounds, or else spread out from 10^-3 to 10^15 away from
+    the finite bound (or 0) on a log scale. It is where custom_distribution looks for the probability from. Gives None if the PDF is 0 at all of them
+    '''
+    reach = np.logspace(-3, 15, 20000)
+    if np.isfinite(lower) and np.isfinite(upper):
+        probe = np.linspace(lower, upper, 20001)
+    elif np.isfinite(lower):
+        probe = np.concatenate(([lower], lower + reach))
+    elif np.isfinite(upper):
+        probe = np.concatenate((upper - reach[::-1], [upper]))
+    else:
+        probe = np.concatenate((-reach[::-1], [0.0], reach))
+    values = density(probe)
+    if not values.max() > 0:
+        return None
+    return float(probe[np.argmax(values)])
+
+def _cdf_grid(density, lower, upper, tol, max_points=2 ** 22):
+    '''
+    The unscaled CDF at evenly spread points from lower to upper, added up with the trapezium rule.
+    The number of points doubles (only working out the PDF at the new points) until the CDF moves by less than tol of the total.
+    Gives the points, the PDF at them and the CDF at them.
+    '''
+    points = 2 ** 10
+    grid = np.linspace(lower, upper, points + 1)
+    values = density(grid)
+    cdf = _cumulative_trapezoid(values, grid[1] - grid[0])
+    while True:
+        if points >= max_points:
+            print("The CDF table reached " + str(points) + " points without changing by less than " + str(tol) + ", so it is less accurate than that.")
+            break
+        points *= 2
+        finer_grid = np.linspace(lower, upper, points + 1)
+        finer_values = np.empty(points + 1)
+        finer_values[::2] = values
+        finer_values[1::2] = density(finer_grid[1::2])
+        finer = _cumulative_trapezoid(finer_values, finer_grid[1] - finer_grid[0])
+        change = np.abs(finer[::2] - cdf).max() / finer[-1] if finer[-1] > 0 else np.inf #The points haven't found the probability yet
+        grid, values, cdf = finer_grid, finer_values, finer
+        if change < tol:
+            break
+    return grid, values, cdf
+
+def _cumulative_trapezoid(values, step):
+    '''
+    The running total of the trapezium rule, starting at 0
+    '''
+    return np.concatenate(([0], np.cumsum((values[1:] + values[:-1]) * (step / 2))))
+
+def _trapezoid(values, step):
+    '''
+    The trapezium rule for evenly spaced values
+    '''
+    return step * (values.sum() - (values[0] + values[-1]) / 2)
+
+def _to_float64(values):
+    '''
+    Turns the result of a numeric calculation into float64, giving a plain float64 rather than a 0-d array when a single number was put in
+    '''
+    return np.asarray(values, dtype=np.float64)[()]
+
+def _valid_probabilities(p):
+    '''
+    Makes an array of probabilities, where anything outside [0,1] is replaced with nan so the quantile gives nan there
+    '''
+    p = np.asarray(p, dtype=np.float64)
+    return np.where((p >= 0) & (p <= 1), p, np.nan)
+
+def _parameter(value):
+    '''
+    Leaves a single number as it is, and turns a list or array of parameters into a numpy array so it broadcasts
+    '''
+    if np.ndim(value) == 0:
+        return value
+    return np.asarray(value)
+
+def _parameter_at(value, shape, index):
+    '''
+    The parameter of one parameter set, as a plain Python number when it came from an array
+    '''
+    if np.ndim(value) == 0:
+        return value
+    return np.broadcast_to(np.asarray(value), shape)[index].item()
+
+def _discrete_quantile_search(p, guess, cdf, top):
+    '''
+    The first whole number n from 0 to top with p < cdf(n), starting from a guess. Each value steps down or up from its guess in steps which double
+    until the answer is between low and high, and then that range is halved until it is one number.
+    The guesses come from _cornish_fisher_guess, so they are almost always right or one out and this takes a few vectorised steps,
+    and even a guess which is far out only takes a few dozen
+    '''
+    p, n = np.broadcast_arrays(p, np.clip(np.nan_to_num(guess), 0, top))
+    low = n #The answer is at least low once stepping down stops
+    high = n #and at most high once stepping up stops
+    with np.errstate(invalid='ignore'):
+        step = 1
+        while True:
+            down = (low > 0) & (p < cdf(low - 1))
+            if not down.any():
+                break
+            high = np.where(down, low - 1, high)
+            low = np.where(down, np.maximum(low - step, 0), low)
+            step *= 2
+        step = 1
+        while True:
+            up = (high < top) & (cdf(high) <= p)
+            if not up.any():
+                break
+            low = np.where(up, high + 1, low)
+            high = np.where(up, np.minimum(high + step, top), high)
+            step *= 2
+        while True:
+            unsettled = low < high
+            if not unsettled.any():
+                break
+            middle = np.floor((low + high) / 2)
+            below = p < cdf(middle)
+            high = np.where(unsettled & below, middle, high)
+            low = np.where(unsettled & ~below, middle + 1, low)
+    return low
+
+def _cornish_fisher_guess(p, mean, sd, skew, kurtosis):
+    '''
+    A first guess at a discrete quantile for _discrete_quantile_search, from the normal approximation corrected for the skew and excess kurtosis.
+    scipy's pdtrik and bdtrik invert the CDF exactly, but they take many times longer than the CDF itself and give nan for very large parameters
+    '''
+    with np.errstate(invalid='ignore'): #p = 0 gives nan, which the search replaces by 0
+        z = ndtri(p)
+        w = z + skew * (z ** 2 - 1) / 6 + kurtosis * (z ** 3 - 3 * z) / 24 - skew ** 2 * (2 * z ** 3 - 5 * z) / 36
+        return np.floor(mean + sd * w + 0.5) #The first whole number n whose CDF, with a continuity correction, is above p
+
+_UNIFORMS = ('random', 'sobol', 'halton', 'lhs', 'stratified', 'antithetic') #The kinds of uniform numbers take_multiple_samples can use
+
+def _uniform_draws(uniforms, num, shape, rng, scramble):
+    '''
+    num points of the chosen kind of uniform numbers in [0,1), one dimension for every parameter set, with the shape (num,) + shape.
+    scipy.stats.qmc is only imported when a quasi random sequence is asked for
+    '''
+    dimension = int(np.prod(shape))
+    if uniforms in ('sobol', 'halton', 'lhs'):
+        from scipy.stats import qmc
+        engines = {'sobol': qmc.Sobol, 'halton': qmc.Halton, 'lhs': qmc.LatinHypercube}
+        u = engines[uniforms](dimension, scramble=scramble, rng=rng).random(num)
+        if not scramble and uniforms != 'lhs':
+            # Unscrambled Sobol and Halton points are multiples of the smallest gap between them and start at exactly 0, whose quantile can be -inf,
+            # so every point is moved to the middle of its cell. An unscrambled Latin hypercube is already in the middles
+            cell = np.diff(np.sort(u, axis=0), axis=0, append=np.ones((1, dimension))).min(axis=0)
+            u = u + cell / 2
+    elif uniforms == 'stratified': #One number in each stratum of every dimension, with the strata in their own random order for each dimension
+        strata = rng.random((num, dimension)).argsort(axis=0)
+        u = (strata + rng.random((num, dimension))) / num
+    else: #antithetic
+        half = rng.random((-(-num // 2), dimension))
+        # random() gives multiples of 2^-53 from 0 to 1 - 2^-53, and this partner maps them onto the same numbers, so 1 is never given
+        u = np.stack((half, (1 - 2 ** -53) - half), axis=1).reshape(-1, dimension)[:num]
+    return u.reshape((num,) + shape)
+
+def _sample_chunk(distribution, seed_sequence, size, method):
+    '''
+    One chunk of take_parallel_samples. It is a module level function so process pools can send it to other processes
+    '''
+    return distribution._draw_samples(size, np.random.default_rng(seed_sequence), method)
+
+def _build_alias_table(pmf):
+    '''
+    Vose's version of Walker's alias method. Each of the len(pmf) columns holds the probability of keeping its own value
+    and the value to give otherwise. It takes O(len(pmf)) time, once per distribution.
+    '''
+    size = len(pmf)
+    prob = np.asarray(pmf, dtype=np.float64) * size
+    alias = np.arange(size)
+    small = list(np.flatnonzero(prob < 1))
+    large = list(np.flatnonzero(prob >= 1))
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        alias[s] = l
+        prob[l] = prob[l] + prob[s] - 1 #The large column gives away what the small column was missing
+        if prob[l] < 1:
+            small.append(l)
+        else:
+            large.append(l)
+    for leftover in small + large: #Anything left is 1 apart from rounding errors
+        prob[leftover] = 1
+    return prob, alias
+
+def _log_choose(n,k):
+    '''
+    The log of n choose k for numbers or numpy arrays, using gammaln so nothing is ever as big as a factorial
+    '''
+    return gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+
 def _choose(n,k):
     '''
     This is here just because I coudn't find a nice to use function on sympy or numpy
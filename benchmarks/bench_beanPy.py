@@ -0,0 +1,123 @@
+'''
+Benchmarks for the hot paths of beanPy: making distributions, sampling, finding the PDF, CDF and quantile, and working out the points the graphs draw.
+They use pytest-benchmark. Run them from the top folder with
+
+    python -m pytest benchmarks/bench_beanPy.py --benchmark-json=bench_output.json
+
+which saves every timing to bench_output.json so it can be compared with an earlier run (see docs/testing.md).
+'''
+import subprocess
+import sys
+
+import matplotlib
+matplotlib.use('Agg') #Draws without a display, so plt.show does nothing
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import beanPy
+
+def bell(x):
+    return np.exp(-x * x / 2) #An unscaled normal PDF for custom_distribution
+
+DISTRIBUTIONS = {
+    'normal': lambda: beanPy.normal_distribution(0, 1),
+    'exponential': lambda: beanPy.exponential_distribution(2),
+    'poisson': lambda: beanPy.poisson_distribution(4),
+    'continuous_uniform': lambda: beanPy.continuous_uniform_distribution(0, 1),
+    'discrete_uniform': lambda: beanPy.discrete_uniform_distribution(0, 10),
+    'binomial': lambda: beanPy.binomial_distribution(20, 0.3),
+    'chi_squared': lambda: beanPy.chi_squared_distribution(3),
+    'custom': lambda: beanPy.custom_distribution(bell),
+}
+SAMPLE_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+@pytest.fixture(params=list(DISTRIBUTIONS))
+def distribution(request):
+    return DISTRIBUTIONS[request.param]()
+
+@pytest.fixture(params=list(DISTRIBUTIONS))
+def make_distribution(request):
+    return DISTRIBUTIONS[request.param]
+
+def test_construction(benchmark, make_distribution):
+    benchmark(make_distribution)
+
+def test_take_sample(benchmark, distribution):
+    benchmark(distribution.take_sample, 1)
+
+@pytest.mark.parametrize('num', SAMPLE_SIZES)
+def test_take_multiple_samples(benchmark, distribution, num):
+    distribution.take_multiple_samples(1, 1) #Makes any cached tables before timing
+    benchmark.pedantic(distribution.take_multiple_samples, args=(num, 1), rounds=3, iterations=1)
+
+@pytest.mark.parametrize('num', [10 ** 5, 10 ** 7])
+def test_take_multiple_samples_alias(benchmark, num):
+    distribution = beanPy.poisson_distribution(4)
+    distribution.take_multiple_samples(1, 1, method='alias')
+    benchmark.pedantic(distribution.take_multiple_samples, args=(num, 1), kwargs={'method': 'alias'}, rounds=3, iterations=1)
+
+def _x_values(distribution, size):
+    '''
+    Values spread over where most of the distribution's probability is
+    '''
+    return distribution.find_quantile(np.linspace(0.01, 0.99, size))
+
+@pytest.mark.parametrize('method', ['find_PDF', 'find_CDF'])
+def test_density_scalar(benchmark, distribution, method):
+    x = float(_x_values(distribution, 1)[0])
+    benchmark(getattr(distribution, method), x)
+
+@pytest.mark.parametrize('method', ['find_PDF', 'find_CDF'])
+def test_density_batch(benchmark, distribution, method):
+    x = _x_values(distribution, 10 ** 6)
+    benchmark(getattr(distribution, method), x)
+
+def test_quantile_scalar(benchmark, distribution):
+    benchmark(distribution.find_quantile, 0.3)
+
+def test_quantile_batch(benchmark, distribution):
+    p = np.random.default_rng(0).random(10 ** 6)
+    benchmark(distribution.find_quantile, p)
+
+@pytest.mark.parametrize('kind', ['CDF', 'PDF'])
+def test_curve_points(benchmark, distribution, kind):
+    benchmark(distribution.curve_points, kind, 10000)
+
+@pytest.mark.parametrize('kind', ['CDF', 'PDF'])
+def test_draw(benchmark, distribution, kind):
+    def draw():
+        getattr(distribution, 'draw_' + kind)(1000)
+        plt.close('all')
+    benchmark(draw)
+
+@pytest.mark.parametrize('kind', ['histogram', 'ECDF'])
+def test_binned_samples(benchmark, distribution, kind):
+    samples = distribution.take_multiple_samples(10 ** 6, 1)
+    benchmark(getattr(distribution, 'find_' + kind), samples)
+
+def test_joint_PDF_grid(benchmark):
+    joint = beanPy.joint_distribution(beanPy.normal_distribution(0, 1), beanPy.exponential_distribution(2))
+    benchmark(joint.find_PDF_grid, (-3, 3, 500), (0, 3, 500))
+
+def test_joint_take_samples(benchmark):
+    joint = beanPy.joint_distribution(beanPy.normal_distribution(0, 1), beanPy.exponential_distribution(2))
+    benchmark(joint.take_samples, 10 ** 5, 1)
+
+IMPORT_CHECK = '''
+import resource, sys
+import beanPy
+beanPy.normal_distribution(0, 1).take_multiple_samples(1000, 1)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'sympy' in sys.modules, 'matplotlib' in sys.modules)
+'''
+
+def test_import_for_sampling(benchmark):
+    '''
+    Times a fresh interpreter importing beanPy and taking some samples, and records its peak memory (in kB on Linux).
+    Sampling should never load sympy or matplotlib.
+    '''
+    run = lambda: subprocess.run([sys.executable, '-c', IMPORT_CHECK], capture_output=True, text=True, check=True).stdout
+    output = benchmark.pedantic(run, rounds=5, iterations=1)
+    max_rss, loaded_sympy, loaded_matplotlib = output.split()
+    benchmark.extra_info['max_rss_kb'] = int(max_rss)
+    assert loaded_sympy == 'False' and loaded_matplotlib == 'False'
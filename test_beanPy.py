@@ -0,0 +1,260 @@
+'''
+Checks that beanPy's distributions behave the way they should. Run it with
+
+    python test_beanPy.py
+
+or with pytest. Every check uses seeded samples, so it gives the same result every time.
+'''
+import numpy as np
+
+import beanPy
+
+DISCRETE = [
+    lambda: beanPy.poisson_distribution(4),
+    lambda: beanPy.binomial_distribution(20, 0.3),
+    lambda: beanPy.discrete_uniform_distribution(0, 10),
+    lambda: beanPy.discrete_uniform_distribution(0, 2, 0.5),
+]
+CONTINUOUS = [
+    lambda: beanPy.normal_distribution(1, 4),
+    lambda: beanPy.exponential_distribution(2),
+    lambda: beanPy.continuous_uniform_distribution(0, 3),
+    lambda: beanPy.chi_squared_distribution(3),
+]
+
+def test_seeded_batch_matches_single_samples():
+    '''
+    A seeded sample is the first of a seeded batch, and a seeded batch is the quantile of the same uniform numbers taken one at a time
+    '''
+    for make in DISCRETE + CONTINUOUS:
+        distribution = make()
+        assert distribution.take_sample(7) == distribution.take_multiple_samples(1, 7)[0]
+        if isinstance(distribution, beanPy.chi_squared_distribution): #Sampled from a gamma generator instead of its quantile
+            continue
+        samples = distribution.take_multiple_samples(200, seed=3)
+        uniforms = np.random.default_rng(3).random(200)
+        assert np.array_equal(samples, [distribution.find_quantile(u) for u in uniforms]), type(distribution).__name__
+
+def test_out_and_dtype():
+    distribution = beanPy.normal_distribution(1, 4)
+    samples = distribution.take_multiple_samples(100, seed=3)
+    assert samples.dtype == np.float64
+    assert beanPy.poisson_distribution(4).take_multiple_samples(100, seed=3).dtype == np.int64
+    single = distribution.take_multiple_samples(100, seed=3, dtype=np.float32)
+    assert single.dtype == np.float32 and np.array_equal(single, samples.astype(np.float32))
+    out = np.zeros(100, dtype=np.float32)
+    assert distribution.take_multiple_samples(100, seed=3, out=out) is out
+    assert np.array_equal(out, single)
+
+def test_unscrambled_sequences_are_finite():
+    '''
+    Unscrambled Sobol and Halton points start at 0, which has to be moved off the edge before its quantile is taken
+    '''
+    for uniforms in ('sobol', 'halton', 'lhs'):
+        for distribution in (beanPy.normal_distribution(0, 1), beanPy.normal_distribution([0, 1, 2], 1), beanPy.poisson_distribution(4)):
+            samples = distribution.take_multiple_samples(8, seed=1, uniforms=uniforms, scramble=False)
+            assert np.isfinite(samples).all(), uniforms
+        assert abs(beanPy.normal_distribution(0, 1).take_multiple_samples(8, seed=1, uniforms=uniforms, scramble=False).mean()) < 1e-12
+    u = np.sort(beanPy._uniform_draws('sobol', 8, (), None, False))
+    assert np.array_equal(u, (np.arange(8) + 0.5) / 8)
+
+def test_quantiles_of_large_parameters():
+    '''
+    A few quantiles of a very wide distribution come from the guided search instead of a huge CDF table, and agree with the table where both can be used
+    '''
+    from scipy import stats
+    p = np.array([1e-9, 0.3, 0.5, 0.999999])
+    for distribution, exact in [(beanPy.poisson_distribution(1e6), stats.poisson(1e6)), (beanPy.binomial_distribution(10 ** 9, 0.5), stats.binom(10 ** 9, 0.5))]:
+        assert np.array_equal([distribution.find_quantile(x) for x in p], exact.ppf(p))
+        assert distribution._table is None
+    wide = beanPy.poisson_distribution(1e11)
+    assert abs(wide.find_quantile(0.5) - 1e11) <= 1 and wide._table is None
+    for distribution in (beanPy.poisson_distribution(1e5), beanPy.binomial_distribution(10 ** 6, 0.3)):
+        u = np.random.default_rng(1).random(1000)
+        searched = [distribution.find_quantile(x) for x in u]
+        assert np.array_equal(searched, distribution.find_quantile(u)) #The array is big enough to make the table
+
+def test_alias_samples():
+    '''
+    The alias table gives every value exactly its probability, samples from it pass the goodness of fit tests,
+    and the tables leave out less than find_truncation_error's bound of 1e-20
+    '''
+    for distribution in (beanPy.poisson_distribution(4), beanPy.binomial_distribution(20, 0.3), beanPy.discrete_uniform_distribution(0, 2, 0.5)):
+        samples = distribution.take_multiple_samples(10 ** 5, seed=8, method='alias')
+        prob, alias = distribution._alias
+        pmf = distribution._support_pmf()
+        given = prob + np.bincount(alias, weights=1 - prob, minlength=len(prob))
+        assert np.allclose(given / len(prob), pmf, rtol=0, atol=1e-15)
+        assert np.isin(samples, distribution._support_values(np.arange(len(pmf)))).all()
+        assert distribution.find_chi_squared_statistic(samples)['p_value'] > 0.01, type(distribution).__name__
+        assert distribution.find_KS_statistic(samples)['p_value'] > 0.01
+    for l in (1e-3, 0.01, 1, 4, 1e3, 1e6, 1e9):
+        assert beanPy.poisson_distribution(l).find_truncation_error() < 1e-20
+
+def test_cache():
+    '''
+    enable_cache keeps the most recently used single values, counting hits and misses, and never shares arrays or keeps nan
+    '''
+    distribution = beanPy.normal_distribution(0, 1)
+    distribution.enable_cache(2)
+    for x in (0.1, 0.2, 0.1, 0.3, 0.2): #0.3 pushes out 0.2, then 0.2 pushes out 0.1
+        distribution.find_CDF(x)
+    assert distribution.cache_info() == {'hits': 1, 'misses': 4, 'maxsize': 2, 'currsize': 2}
+    distribution.find_CDF(0.3)
+    distribution.find_CDF(0.1)
+    assert distribution.cache_info()['hits'] == 2 and distribution.cache_info()['misses'] == 5
+    for x in (np.array([0.1, 0.2]), [0.1, 0.2], (0.1, 0.2)):
+        distribution.find_CDF(x)[0] = 5
+        assert distribution.find_CDF(x)[0] != 5
+    grid = beanPy.poisson_distribution([1, 2]) #One x gives an array for a grid
+    grid.enable_cache(None)
+    grid.find_PDF(1)[0] = 5
+    assert grid.find_PDF(1)[0] != 5 and grid.cache_info()['currsize'] == 0
+    distribution.enable_cache(None)
+    for _ in range(5):
+        assert np.isnan(distribution.find_CDF(np.nan))
+    assert distribution.cache_info() == {'hits': 0, 'misses': 0, 'maxsize': None, 'currsize': 0}
+
+def test_pickle_and_dict():
+    '''
+    Pickling and to_dict only keep the type and the parameters, and give back a distribution which works the same.
+    The formulas and tables are never pickled, and are made again when they are next used
+    '''
+    import json, pickle
+    cases = [beanPy.normal_distribution(1, 4), beanPy.poisson_distribution([1, 2, 3]),
+             beanPy.joint_distribution(beanPy.normal_distribution(0, 1), beanPy.exponential_distribution(2)),
+             beanPy.discrete_table_distribution([0.2, 0.8], start=1, step=0.5), beanPy.poisson_distribution(3).find_sum_distribution(4)]
+    for distribution in cases:
+        for copy in (pickle.loads(pickle.dumps(distribution)), beanPy.Distribution.from_dict(json.loads(json.dumps(distribution.to_dict())))):
+            assert type(copy) is type(distribution) and copy.to_dict() == distribution.to_dict()
+            if isinstance(distribution, beanPy.joint_distribution):
+                assert copy.find_PDF(0.5, 0.5) == distribution.find_PDF(0.5, 0.5)
+                assert np.array_equal(copy.take_samples(10, seed=1), distribution.take_samples(10, seed=1))
+            else:
+                assert np.array_equal(copy.take_multiple_samples(10, seed=1), distribution.take_multiple_samples(10, seed=1))
+    normal = beanPy.normal_distribution(1, 4)
+    normal.pdf
+    poisson = beanPy.poisson_distribution(4)
+    poisson.take_multiple_samples(10, seed=1, method='alias')
+    joint = beanPy.joint_distribution(normal, beanPy.exponential_distribution(2))
+    joint.pdf
+    assert len(pickle.dumps(normal)) < 100 and len(pickle.dumps(poisson)) < 100 and len(pickle.dumps(joint)) < 200
+    copy = pickle.loads(pickle.dumps(normal))
+    assert copy._symbolic is None
+    assert copy.pdf == normal.pdf and 'pdf' in copy._symbolic
+    copy = pickle.loads(pickle.dumps(poisson))
+    assert copy._table is None and copy._alias is None
+    copy = pickle.loads(pickle.dumps(joint))
+    assert copy._pdf is None and copy.pdf == joint.pdf
+
+def test_KS_accepts_own_samples():
+    '''
+    Samples which really follow the distribution shouldn't be rejected, by the binned, exact or chunked statistic
+    '''
+    for make in DISCRETE + CONTINUOUS:
+        distribution = make()
+        samples = distribution.take_multiple_samples(10 ** 5, seed=1)
+        for result in (distribution.find_KS_statistic(samples),
+                       distribution.find_KS_statistic(samples, bins=None),
+                       distribution.find_KS_statistic(distribution.take_sample_chunks(10 ** 5, 7000, seed=1))):
+            assert result['count'] == 10 ** 5
+            assert result['p_value'] > 0.01, (type(distribution).__name__, result)
+
+def test_KS_rejects_other_samples():
+    for distribution, other in [(beanPy.poisson_distribution(4), beanPy.poisson_distribution(4.2)),
+                                (beanPy.normal_distribution(0, 1), beanPy.normal_distribution(0.05, 1))]:
+        assert distribution.find_KS_statistic(other.take_multiple_samples(10 ** 5, seed=2))['p_value'] < 1e-6
+
+def test_chi_squared_statistic():
+    for make in DISCRETE:
+        distribution = make()
+        assert distribution.find_chi_squared_statistic(distribution.take_multiple_samples(10 ** 5, seed=3))['p_value'] > 0.01
+    poisson = beanPy.poisson_distribution(4)
+    assert poisson.find_chi_squared_statistic(beanPy.poisson_distribution(4.2).take_multiple_samples(10 ** 5, seed=3))['p_value'] < 1e-6
+
+def test_check_moments():
+    for make in DISCRETE + CONTINUOUS:
+        distribution = make()
+        result = distribution.check_moments(distribution.take_sample_chunks(10 ** 5, 3000, seed=4))
+        assert result['count'] == 10 ** 5
+        assert abs(result['mean_z']) < 4, (type(distribution).__name__, result)
+        assert abs(result['sample_var'] / distribution.var - 1) < 0.05
+
+def test_parameter_grid():
+    '''
+    Each column of a grid's samples is its own parameter set, and the methods which need single numbers as parameters give None instead of failing
+    '''
+    grid = beanPy.poisson_distribution([1, 40])
+    samples = grid.take_multiple_samples(1000, seed=[5, 6])
+    assert samples.shape == (1000, 2)
+    assert np.array_equal(samples[:, 1], beanPy.poisson_distribution(40).take_multiple_samples(1000, seed=6))
+    assert grid.find_parameter_set((1,)).find_KS_statistic(samples[:, 1])['p_value'] > 0.01
+    for check in (grid.check_moments, grid.find_KS_statistic, grid.find_chi_squared_statistic, grid.find_histogram, grid.find_ECDF):
+        assert check(samples) is None
+    normals = beanPy.normal_distribution([0, 1], 1)
+    assert normals.pdf is None and normals.cdf is None and normals.quantile is None
+    assert beanPy.joint_distribution(normals, beanPy.normal_distribution(0, 1)).pdf is None
+
+def test_custom_distribution_far_from_0():
+    '''
+    The probability is found where the PDF is, not just near 0
+    '''
+    custom = beanPy.custom_distribution(lambda x: np.exp(-(x - 1000) ** 2 / 2))
+    assert abs(custom.mean - 1000) < 1e-6 and abs(custom.var - 1) < 1e-6
+    assert abs(custom.find_quantile(0.5) - 1000) < 1e-6
+
+def test_sum_distribution():
+    '''
+    The sum of 10**4 Poisson(4) samples is Poisson(4 * 10**4), and a small sum with a step of 0.5 is the exact convolution of the PMF
+    '''
+    from scipy import stats
+    total = beanPy.poisson_distribution(4).find_sum_distribution(10 ** 4)
+    exact = stats.poisson(4 * 10 ** 4)
+    x = np.arange(39000, 41001)
+    assert np.abs(total.find_PDF(x) - exact.pmf(x)).max() < 1e-12
+    assert np.abs(total.find_CDF(x) - exact.cdf(x)).max() < 1e-12
+    assert np.abs(total.find_CDF(x + 0.5) - exact.cdf(x)).max() < 1e-12
+    p = np.random.default_rng(9).random(1000)
+    assert np.array_equal(total.find_quantile(p), exact.ppf(p))
+    stepped = beanPy.discrete_uniform_distribution(0, 2, 0.5).find_sum_distribution(3)
+    pmf = np.full(5, 0.2)
+    convolved = np.convolve(np.convolve(pmf, pmf), pmf)
+    values = np.arange(13) * 0.5
+    assert np.abs(stepped.find_PDF(values) - convolved).max() < 1e-12
+    assert np.abs(stepped.find_CDF(values) - np.cumsum(convolved)).max() < 1e-12
+    assert stepped.find_PDF(0.25) == 0 and stepped.find_quantile(0.5) == 3
+    assert abs(stepped.mean - 3) < 1e-12 and abs(stepped.var - 1.5) < 1e-12
+
+def test_sample_store():
+    '''
+    A stored file gives back exactly the samples take_multiple_samples makes, and max_bytes deletes the least recently used file
+    '''
+    import os, tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        store = beanPy.sample_store(directory, chunk_size=300)
+        for distribution, seed, method in [(beanPy.normal_distribution(1, 4), 1, 'quantile'), (beanPy.poisson_distribution([1, 40]), [5, 6], 'quantile'),
+                                           (beanPy.poisson_distribution(4), 2, 'alias'), (beanPy.binomial_distribution(20, 0.3), 3, 'alias')]:
+            expected = distribution.take_multiple_samples(1000, seed, method=method)
+            for _ in range(2): #Made and stored the first time, and opened from the file the second
+                stored = store.take_multiple_samples(distribution, 1000, seed, method=method)
+                assert isinstance(stored, np.memmap) and stored.dtype == expected.dtype and np.array_equal(stored, expected)
+        assert store.info()['hits'] == 4 and store.info()['misses'] == 4 and store.info()['files'] == 4
+
+        normal = beanPy.normal_distribution(0, 1)
+        store = beanPy.sample_store(directory, max_bytes=2.5 * 8128) #Room for two files of 1000 float64 samples
+        store.clear()
+        paths = []
+        for seed in (1, 2):
+            paths.append(store.take_multiple_samples(normal, 1000, seed).filename)
+        os.utime(paths[0], (1000, 1000))
+        os.utime(paths[1], (2000, 2000))
+        store.take_multiple_samples(normal, 1000, 1) #Using the first file again makes the second the least recently used
+        store.take_multiple_samples(normal, 1000, 3)
+        assert os.path.exists(paths[0]) and not os.path.exists(paths[1])
+        assert store.info()['files'] == 2 and store.info()['bytes'] <= store.max_bytes
+
+if __name__ == '__main__':
+    for name, check in list(globals().items()):
+        if name.startswith('test_'):
+            check()
+            print(name, 'passed')